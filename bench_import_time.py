@@ -0,0 +1,94 @@
+
+"""Import-time regression benchmark.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters for the
+lightweight modules and the CLI module, reports the median cumulative import time of
+the module itself (interpreter startup excluded) and flags any heavy dependency that
+got pulled in. With --check the exit code is non-zero when a budget is exceeded
+or a heavy module is loaded.
+
+    python bench_import_time.py --repeat 7 --check
+"""
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ('pandas', 'sklearn', 'shap', 'networkx', 'scipy', 'torch')
+
+# module -> budget in ms; modules on the NumPy paths pay for importing numpy itself
+TARGETS = {
+    'xsec_cli': 30,
+    'decision_rules': 30,
+    'risk_scoring': 200,
+    'patch_ranking': 200,
+    'graph_utils': 200,
+    'twin_arrays': 200,
+    'risk_attribution': 200,
+    'encoding': 200,
+    'normalization': 200,
+    'feature_extraction': 200,
+    'dependency_graph_builder': 200,
+    'shap_computation': 200
+}
+
+
+def measure(module: str) -> Dict[str, Any]:
+    """One cold run: cumulative import time of module (ms) and the heavy top-level packages imported."""
+    env = dict(os.environ, PYTHONPATH=HERE + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=HERE, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f'import {module} failed: {proc.stderr.strip().splitlines()[-1:]}')
+    ms, heavy = None, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.strip() == module and name[1:2] != ' ':
+            ms = int(cumulative) / 1000.0
+        top = name.strip().split('.')[0]
+        if top in HEAVY_MODULES:
+            heavy.add(top)
+    return {'ms': ms or 0.0, 'heavy': sorted(heavy)}
+
+
+def run(targets: Dict[str, float], repeat: int = 5) -> List[Dict[str, Any]]:
+    rows = []
+    for target, budget in targets.items():
+        runs = [measure(target) for _ in range(repeat)]
+        ms = statistics.median(r['ms'] for r in runs)
+        heavy = sorted(set().union(*(r['heavy'] for r in runs)))
+        rows.append({'target': target, 'median_ms': round(ms, 1), 'budget_ms': budget,
+                     'heavy_modules': heavy, 'ok': ms <= budget and not heavy})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold import time of the lightweight modules')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--targets', nargs='*', default=None, help='Subset of modules (default: all)')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='Multiply every budget (slow machines)')
+    parser.add_argument('--json', default=None, help='Write results to this JSON file')
+    parser.add_argument('--check', action='store_true', help='Exit 1 if a budget is exceeded or a heavy module is imported')
+    args = parser.parse_args()
+
+    targets = {t: b * args.budget_scale for t, b in TARGETS.items() if not args.targets or t in args.targets}
+    rows = run(targets, repeat=args.repeat)
+    for r in rows:
+        flag = 'ok' if r['ok'] else 'FAIL'
+        heavy = ' heavy=' + ','.join(r['heavy_modules']) if r['heavy_modules'] else ''
+        print(f"{r['target']:<26} {r['median_ms']:>8.1f} ms  (budget {r['budget_ms']:.0f} ms) {flag}{heavy}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump({'python': sys.version, 'repeat': args.repeat, 'results': rows}, fh, indent=2)
+    if args.check and not all(r['ok'] for r in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
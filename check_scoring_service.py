@@ -0,0 +1,183 @@
+
+"""Localhost round-trip check for scoring_service.
+
+Writes a random twin (components, dependencies, vulnerabilities CSVs), starts
+ScoringService on 127.0.0.1 in a background thread and queries it over HTTP with
+ScoringClient from several threads at once, so requests share micro-batches. Every
+answer must equal the single-record reference: compute_node_risk and triage_rule per
+component, propagate_risk_array over load_twin_arrays edges and rank_by_roi for top_k.
+The feed is then mutated and /reload must serve the new scores. Malformed requests
+must get a 400.
+
+    python check_scoring_service.py --components 5000 --clients 8
+"""
+from typing import Any, Dict, List, Tuple
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from decision_rules import triage_rule
+from feature_extraction import extract_features_from_csvs
+from graph_utils import propagate_risk_array
+from patch_ranking import rank_by_roi
+from risk_scoring import compute_node_risk
+from scoring_service import ScoringClient, ScoringService, TwinState
+from twin_arrays import load_twin_arrays
+
+
+def write_twin(rng: np.random.Generator, tmp: str, n: int, tag: str) -> Dict[str, str]:
+    ids = [f'c{i}' for i in range(n)]
+    pd.DataFrame({
+        'component_id': ids,
+        'role': rng.choice(['db', 'plc', 'hmi', 'web'], n),
+        'os_type': rng.choice(['linux', 'windows', 'rtos'], n),
+        'layer': rng.choice(['it', 'ot', 'dmz'], n),
+        'criticality': rng.integers(1, 6, n),
+        'exposure_level': rng.choice(['internal', 'dmz', 'internet'], n),
+        'is_patched': rng.choice(['true', 'false'], n)
+    }).to_csv(os.path.join(tmp, f'components_{tag}.csv'), index=False)
+    m = 3 * n
+    pd.DataFrame({
+        'source_component': [f'c{i}' for i in rng.integers(0, n + 10, m)],   # a few unknown ids
+        'target_component': [f'c{i}' for i in rng.integers(0, n, m)],
+        'dependency_type': rng.choice(['auth', 'data', 'control'], m)
+    }).to_csv(os.path.join(tmp, f'dependencies_{tag}.csv'), index=False)
+    v = 2 * n
+    pd.DataFrame({
+        'component_id': [f'c{i}' for i in rng.integers(0, n, v)],
+        'cvss_score': rng.integers(0, 101, v) / 10.0,
+        'attack_surface': rng.choice(['a', 'b'], v),
+        'access_vector': rng.choice(['N', 'A', 'L'], v)
+    }).to_csv(os.path.join(tmp, f'vulnerabilities_{tag}.csv'), index=False)
+    return {k: os.path.join(tmp, f'{k.split("_")[0]}_{tag}.csv')
+            for k in ('components_csv', 'dependencies_csv', 'vulnerabilities_csv')}
+
+
+def reference(paths: Dict[str, str], cost_map: Dict[str, float]) -> Dict[str, Any]:
+    """Per-component expectations from the record-at-a-time code paths."""
+    features = extract_features_from_csvs(paths['components_csv'], paths['dependencies_csv'], paths['vulnerabilities_csv'])
+    records = features.to_dict(orient='records')
+    risk = {r['component_id']: compute_node_risk(r, r)['node_risk'] for r in records}
+    triage = {r['component_id']: triage_rule(risk[r['component_id']], int(r['vuln_count'])) for r in records}
+    t = load_twin_arrays(paths['components_csv'], paths['vulnerabilities_csv'], paths['dependencies_csv'])
+    r = np.array([risk[c] for c in t['component_id']])
+    prop = dict(zip(t['component_id'], propagate_risk_array(r, t['src'], t['dst']).tolist()))
+    ranking = rank_by_roi(records, {rec['component_id']: rec for rec in records}, cost_map)
+    return {'risk': risk, 'propagated': prop, 'triage': triage, 'ranking': ranking}
+
+
+def start_service(state: TwinState, cost_map: Dict[str, float]) -> Tuple[ScoringService, asyncio.AbstractEventLoop]:
+    loop = asyncio.new_event_loop()
+    service = ScoringService(state, cost_map=cost_map)
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    asyncio.run_coroutine_threadsafe(service.start('127.0.0.1', 0), loop).result()
+    return service, loop
+
+
+def query_all(port: int, ids: List[str], clients: int, chunk: int) -> Dict[str, Dict[str, Any]]:
+    def work(part: List[str]) -> Dict[str, Dict[str, Any]]:
+        client = ScoringClient('127.0.0.1', port)
+        try:
+            return {op: client.query(op, ids=part) for op in ('risk', 'propagated', 'triage')}
+        finally:
+            client.close()
+
+    out: Dict[str, Dict[str, Any]] = {'risk': {}, 'propagated': {}, 'triage': {}}
+    with ThreadPoolExecutor(clients) as pool:
+        for res in pool.map(work, [ids[i:i + chunk] for i in range(0, len(ids), chunk)]):
+            for op, vals in res.items():
+                out[op].update(vals)
+    return out
+
+
+def compare(port: int, ref: Dict[str, Any], clients: int, chunk: int, label: str) -> int:
+    failures = 0
+    ids = sorted(ref['risk'])
+    got = query_all(port, ids + ['no-such-component'], clients, chunk)
+    for op in ('risk', 'propagated', 'triage'):
+        bad = [c for c in ids if got[op].get(c) != ref[op][c]]
+        if bad:
+            print(f'FAIL {label} {op}: {len(bad)} components differ, e.g. {bad[0]}: '
+                  f'{got[op].get(bad[0])!r} != {ref[op][bad[0]]!r}')
+            failures += 1
+        if got[op].get('no-such-component', 0) is not None:
+            print(f'FAIL {label} {op}: unknown component did not map to null')
+            failures += 1
+    client = ScoringClient('127.0.0.1', port)
+    top = client.query('top_k', k=25)
+    client.close()
+    if top != ref['ranking'][:25]:
+        print(f'FAIL {label} top_k: differs from rank_by_roi')
+        failures += 1
+    return failures
+
+
+def check_bad_requests(port: int) -> int:
+    cases = [
+        ('POST', '/query', b'{"op": "risk", "ids": "c1"}', {}),
+        ('POST', '/query', b'not json', {}),
+        ('POST', '/reload', b'[1, 2]', {}),
+        ('POST', '/reload', json.dumps({'components_csv': '/no/such/file.csv'}).encode('utf-8'), {}),
+        ('POST', '/query', b'{}', {'Content-Length': 'abc'})
+    ]
+    failures = 0
+    for method, path, body, headers in cases:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.putrequest(method, path)
+        conn.putheader('Content-Length', headers.get('Content-Length', str(len(body))))
+        conn.endheaders(body)
+        resp = conn.getresponse()
+        resp.read()
+        conn.close()
+        if resp.status != 400:
+            print(f'FAIL {method} {path} {body[:40]!r}: status {resp.status}, expected 400')
+            failures += 1
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check scoring_service answers over a localhost round-trip')
+    parser.add_argument('--components', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--chunk', type=int, default=100, help='Component ids per query')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    cost_map = {f'c{i}': float(c) for i, c in enumerate(rng.uniform(1, 10, args.components))}
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_twin(rng, tmp, args.components, 'a')
+        state = TwinState.from_csvs(paths['components_csv'], paths['dependencies_csv'], paths['vulnerabilities_csv'],
+                                    cost_map=cost_map)
+        service, loop = start_service(state, cost_map)
+        try:
+            failures += compare(service.port, reference(paths, cost_map), args.clients, args.chunk, 'initial')
+            failures += check_bad_requests(service.port)
+
+            new_paths = write_twin(rng, tmp, args.components, 'b')
+            client = ScoringClient('127.0.0.1', service.port)
+            res = client.reload(**new_paths)
+            health = client.health()
+            client.close()
+            if res.get('generation') != 1 or health.get('generation') != 1:
+                print(f'FAIL reload: generation {res.get("generation")} / health {health.get("generation")}, expected 1')
+                failures += 1
+            failures += compare(service.port, reference(new_paths, cost_map), args.clients, args.chunk, 'reloaded')
+        finally:
+            asyncio.run_coroutine_threadsafe(service.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+    print('ok' if not failures else f'{failures} failure(s)')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
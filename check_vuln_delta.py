@@ -0,0 +1,112 @@
+
+"""Randomized consistency check for VulnerabilityDeltaIngestor.
+
+Feeds a sequence of randomly mutated vulnerability snapshots (additions, removals,
+re-scores, unparsable scores) through the ingestor, both as DataFrames and as CSV
+paths, with and without a vuln_id column. After every delta the incremental stats
+must equal aggregate_vuln_stats over the full snapshot and, when ids are present,
+last_diff must report exactly the mutations applied.
+
+    python check_vuln_delta.py --rows 200000 --rounds 5
+"""
+from typing import Any, Dict
+import argparse
+import math
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from feature_extraction import VulnerabilityDeltaIngestor, VULN_STAT_COLUMNS, aggregate_vuln_stats
+
+
+def random_feed(rng: np.random.Generator, rows: int, n_components: int) -> pd.DataFrame:
+    scores = rng.integers(0, 101, rows) / 10.0
+    scores[rng.random(rows) < 0.01] = np.nan
+    return pd.DataFrame({
+        'vuln_id': [f'V{i}' for i in range(rows)],
+        'component_id': [f'c{i}' for i in rng.integers(0, n_components, rows)],
+        'cvss_score': scores,
+        'attack_surface': rng.choice(['network', 'local', ''], rows),
+        'access_vector': rng.choice(['N', 'A', 'L'], rows)
+    })
+
+
+def mutate(rng: np.random.Generator, feed: pd.DataFrame, n_components: int, next_id: int, frac: float = 0.01):
+    """Drop, re-score and append about frac of the rows each; returns (feed, expected diff, next_id)."""
+    n = len(feed)
+    k = max(1, int(n * frac))
+    keep = np.ones(n, dtype=bool)
+    keep[rng.choice(n, k, replace=False)] = False
+    feed = feed[keep].reset_index(drop=True)
+    rescore = rng.choice(len(feed), k, replace=False)
+    old = feed.loc[rescore, 'cvss_score'].to_numpy()
+    new = (rng.integers(0, 101, k) / 10.0)
+    feed.loc[rescore, 'cvss_score'] = new
+    rescored = int(np.sum(~((old == new) | (np.isnan(old) & np.isnan(new)))))
+    extra = random_feed(rng, k, n_components)
+    extra['vuln_id'] = [f'V{next_id + i}' for i in range(k)]
+    feed = pd.concat([feed, extra], ignore_index=True)
+    return feed, {'added': k, 'removed': k, 'rescored': rescored}, next_id + k
+
+
+def compare(ingestor: VulnerabilityDeltaIngestor, feed: pd.DataFrame) -> int:
+    """Number of components whose incremental stats differ from aggregate_vuln_stats."""
+    ref: Dict[str, Dict[str, Any]] = aggregate_vuln_stats(feed)
+    empty = {c: 0.0 for c in VULN_STAT_COLUMNS}
+    bad = 0
+    for cid in set(ref) | set(ingestor.stats):
+        a, b = ingestor.component_stats(cid), ref.get(cid, empty)
+        if any(not math.isclose(a[c], b[c], rel_tol=1e-12, abs_tol=1e-9) for c in VULN_STAT_COLUMNS):
+            bad += 1
+    return bad
+
+
+def run(rows: int, rounds: int, n_components: int, seed: int, with_ids: bool, from_path: bool) -> int:
+    rng = np.random.default_rng(seed)
+    feed = random_feed(rng, rows, n_components)
+    next_id = rows
+    ingestor = VulnerabilityDeltaIngestor()
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for r in range(rounds + 1):
+            data = feed if with_ids else feed.drop(columns=['vuln_id'])
+            if from_path:
+                path = os.path.join(tmp, f'feed{r}.csv')
+                data.to_csv(path, index=False)
+                ingestor.ingest(path)
+            else:
+                ingestor.ingest(data)
+            bad = compare(ingestor, feed)
+            label = f'ids={with_ids} path={from_path} round={r}'
+            if bad:
+                print(f'FAIL {label}: {bad} components differ from aggregate_vuln_stats')
+                failures += 1
+            if r and with_ids:
+                got = {k: ingestor.last_diff[k] for k in expected}
+                if got != expected:
+                    print(f'FAIL {label}: last_diff {got} != expected {expected}')
+                    failures += 1
+            feed, expected, next_id = mutate(rng, feed, n_components, next_id)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check delta ingestion against full re-aggregation')
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--components', type=int, default=20_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    failures = 0
+    for with_ids in (True, False):
+        for from_path in (False, True):
+            failures += run(args.rows, args.rounds, args.components, args.seed, with_ids, from_path)
+    print('ok' if not failures else f'{failures} failure(s)')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,8 @@ RULE_THRESHOLDS = {
     'medium': 0.3
 }
 
+TRIAGE_LEVELS = ['LOW', 'MEDIUM', 'HIGH', 'URGENT']
+
 def triage_rule(node_risk: float, vuln_count: int) -> str:
     if node_risk >= RULE_THRESHOLDS['urgent'] and vuln_count >= 1:
         return 'URGENT'
@@ -39,3 +41,15 @@ def decision_table_example() -> List[Dict[str, Any]]:
         {'priority': 'MEDIUM', 'condition': '0.3 <= node_risk < 0.6', 'action': 'Schedule patch within 30 days or monitor'},
         {'priority': 'LOW', 'condition': 'node_risk < 0.3', 'action': 'Patch in regular maintenance'}
     ]
+
+def triage_array(node_risk, vuln_count):
+    """Vectorized triage_rule; returns integer codes indexing TRIAGE_LEVELS."""
+    import numpy as np
+    node_risk = np.asarray(node_risk, dtype=float)
+    vuln_count = np.asarray(vuln_count)
+    return np.select(
+        [(node_risk >= RULE_THRESHOLDS['urgent']) & (vuln_count >= 1),
+         node_risk >= RULE_THRESHOLDS['high'],
+         node_risk >= RULE_THRESHOLDS['medium']],
+        [3, 2, 1], default=0)
+
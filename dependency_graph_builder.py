@@ -1,11 +1,10 @@
 
-from typing import Iterable, Tuple, Dict, Any, List, Optional
+from typing import Iterable, Tuple, Dict, Any, List, Optional, Sequence
+import importlib.util
+import numpy as np
 
-try:
-    import networkx as nx
-    HAS_NX = True
-except Exception:
-    HAS_NX = False
+# networkx is imported only when a networkx graph is actually built
+HAS_NX = importlib.util.find_spec('networkx') is not None
 
 DependencyRow = Tuple[str, str, str]
 
@@ -71,6 +70,119 @@ class SimpleDiGraph:
         return order
 
 
+class SparseDependencyGraph:
+    """CSR adjacency over factorized component ids.
+
+    Edges are unique (src, dst) pairs sorted by (src, dst); edge_type[k] is the
+    integer code (into dependency_types) of the k-th stored edge, i.e. aligned with
+    adjacency.indices. Exposes the SimpleDiGraph query API so it can be passed to
+    code that only needs nodes / successors / predecessors.
+    """
+
+    def __init__(self, node_ids: Sequence[str], indptr: np.ndarray, indices: np.ndarray,
+                 edge_type: np.ndarray, dependency_types: Sequence[str]):
+        self.node_ids = np.asarray(node_ids, dtype=object)
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_type = edge_type
+        self.dependency_types = list(dependency_types)
+        self._index = None
+        self._csr = None
+        self._csc = None
+        self._nx = None
+
+    @property
+    def nodes(self) -> List[str]:
+        return self.node_ids.tolist()
+
+    @property
+    def index(self) -> Dict[str, int]:
+        if self._index is None:
+            self._index = {n: i for i, n in enumerate(self.node_ids.tolist())}
+        return self._index
+
+    def number_of_nodes(self) -> int:
+        return len(self.node_ids)
+
+    def number_of_edges(self) -> int:
+        return len(self.indices)
+
+    @property
+    def adjacency(self):
+        """scipy.sparse CSR matrix of ones sharing indptr/indices with this graph."""
+        if self._csr is None:
+            import scipy.sparse as sp
+            n = len(self.node_ids)
+            self._csr = sp.csr_matrix((np.ones(len(self.indices)), self.indices, self.indptr), shape=(n, n),
+                                      copy=False)
+        return self._csr
+
+    def edge_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(src, dst) integer arrays in stored edge order."""
+        src = np.repeat(np.arange(len(self.node_ids)), np.diff(self.indptr))
+        return src, self.indices
+
+    def successors(self, n):
+        i = self.index.get(n)
+        if i is None:
+            return []
+        return self.node_ids[self.indices[self.indptr[i]:self.indptr[i + 1]]].tolist()
+
+    def predecessors(self, n):
+        if self._csc is None:
+            self._csc = self.adjacency.tocsc()
+        i = self.index.get(n)
+        if i is None:
+            return []
+        return self.node_ids[self._csc.indices[self._csc.indptr[i]:self._csc.indptr[i + 1]]].tolist()
+
+    def edge_dependency_type(self, u, v) -> str:
+        i, j = self.index[u], self.index[v]
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        k = lo + np.searchsorted(self.indices[lo:hi], j)
+        if k >= hi or self.indices[k] != j:
+            raise KeyError((u, v))
+        return self.dependency_types[self.edge_type[k]]
+
+    def has_cycle(self) -> bool:
+        from scipy.sparse.csgraph import connected_components
+        n_comp, _ = connected_components(self.adjacency, directed=True, connection='strong')
+        src, dst = self.edge_arrays()
+        return n_comp < len(self.node_ids) or bool(np.any(src == dst))
+
+    def topological_sort(self):
+        indeg = np.bincount(self.indices, minlength=len(self.node_ids))
+        q = list(np.flatnonzero(indeg == 0))
+        order = []
+        head = 0
+        while head < len(q):
+            i = q[head]
+            head += 1
+            order.append(i)
+            for j in self.indices[self.indptr[i]:self.indptr[i + 1]]:
+                indeg[j] -= 1
+                if indeg[j] == 0:
+                    q.append(j)
+        if len(order) != len(self.node_ids):
+            raise ValueError("Graph has cycles")
+        return self.node_ids[np.asarray(order, dtype=np.int64)].tolist()
+
+    def to_networkx(self):
+        """networkx.DiGraph copy (with dependency_type edge attributes), built once on first call."""
+        if self._nx is None:
+            if not HAS_NX:
+                raise ImportError('networkx is required for to_networkx()')
+            import networkx as nx
+            G = nx.DiGraph()
+            G.add_nodes_from(self.node_ids.tolist())
+            src, dst = self.edge_arrays()
+            types = np.asarray(self.dependency_types, dtype=object)[self.edge_type]
+            G.add_edges_from(zip(self.node_ids[src].tolist(), self.node_ids[dst].tolist(),
+                                 ({'dependency_type': t} for t in types.tolist())))
+            self._nx = G
+        return self._nx
+
+
 class DependencyGraphBuilder:
     def __init__(self, use_networkx: Optional[bool] = None):
         self.use_networkx = HAS_NX if use_networkx is None else (use_networkx and HAS_NX)
@@ -79,6 +191,7 @@ class DependencyGraphBuilder:
         node_attrs = node_attrs or {}
 
         if self.use_networkx:
+            import networkx as nx
             G = nx.DiGraph()
             for n, a in node_attrs.items():
                 G.add_node(n, **a)
@@ -92,3 +205,48 @@ class DependencyGraphBuilder:
         for s, t, d in rows:
             G.add_edge(s, t, dependency_type=d)
         return G
+
+    def build_sparse(self, deps, node_ids: Optional[Sequence[str]] = None) -> SparseDependencyGraph:
+        """Build a SparseDependencyGraph straight from a load_dependencies() DataFrame.
+
+        Component ids are factorized once (node_ids first, then new endpoints in order of
+        appearance); rows with a blank endpoint are skipped. Duplicate edges keep the
+        last dependency_type, as repeated add_edge calls would.
+        """
+        import pandas as pd
+
+        src_col = deps['source_component'].astype(str).to_numpy(dtype=object)
+        dst_col = deps['target_component'].astype(str).to_numpy(dtype=object)
+        keep = (src_col != '') & (dst_col != '')
+        src_col, dst_col = src_col[keep], dst_col[keep]
+        type_col = deps['dependency_type'].astype(str).to_numpy(dtype=object)[keep]
+
+        base = np.asarray(list(node_ids) if node_ids is not None else [], dtype=object)
+        m = len(src_col)
+        # interleave endpoints so ids are numbered in edge order like SimpleDiGraph.add_edge
+        endpoints = np.empty(2 * m, dtype=object)
+        endpoints[0::2] = src_col
+        endpoints[1::2] = dst_col
+        codes, uniques = pd.factorize(np.concatenate([base, endpoints]))
+        n = len(uniques)
+        src = codes[len(base):][0::2].astype(np.int64)
+        dst = codes[len(base):][1::2].astype(np.int64)
+        type_codes, type_names = pd.factorize(type_col)
+
+        key = src * n + dst
+        order = np.lexsort((np.arange(m), key))
+        key_sorted = key[order]
+        last = np.ones(m, dtype=bool)
+        last[:-1] = key_sorted[1:] != key_sorted[:-1]
+        sel = order[last]
+        src, dst = src[sel], dst[sel]
+        code_dtype = np.int8 if len(type_names) < 128 else np.int32
+        edge_type = type_codes[sel].astype(code_dtype)
+
+        # int32 where it fits, as scipy would choose, so adjacency can wrap the arrays without copying
+        index_dtype = np.int32 if max(n, len(dst)) <= np.iinfo(np.int32).max else np.int64
+        indptr = np.zeros(n + 1, dtype=index_dtype)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        return SparseDependencyGraph(uniques, indptr, dst.astype(index_dtype), edge_type,
+                                     [str(t) for t in type_names])
+
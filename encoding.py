@@ -1,11 +1,15 @@
 
-from typing import List, Tuple, Dict, Any, Optional
-import pandas as pd
+from typing import List, Tuple, Dict, Any, Optional, TYPE_CHECKING
+if TYPE_CHECKING:
+    import pandas as pd
+from profiling import profiled
 
 
-def one_hot_encode(df: pd.DataFrame, categorical_columns: List[str], drop_first: bool = False,
-                   treat_missing_as_category: bool = True) -> Tuple[pd.DataFrame, List[str]]:
+@profiled()
+def one_hot_encode(df: 'pd.DataFrame', categorical_columns: List[str], drop_first: bool = False,
+                   treat_missing_as_category: bool = True) -> Tuple['pd.DataFrame', List[str]]:
 
+    import pandas as pd
     d = df.copy()
     for col in categorical_columns:
         if col not in d.columns:
@@ -20,7 +24,8 @@ def one_hot_encode(df: pd.DataFrame, categorical_columns: List[str], drop_first:
     return encoded, encoded_columns
 
 
-def label_encode_boolean(df: pd.DataFrame, boolean_columns: List[str]) -> pd.DataFrame:
+@profiled()
+def label_encode_boolean(df: 'pd.DataFrame', boolean_columns: List[str]) -> 'pd.DataFrame':
     d = df.copy()
     for col in boolean_columns:
         if col not in d.columns:
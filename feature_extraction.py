@@ -1,10 +1,16 @@
 
-from typing import Dict, List, Any, Optional
-import pandas as pd
+from typing import Dict, List, Any, Optional, Set, Union, TYPE_CHECKING
+import math
+import pickle
+if TYPE_CHECKING:
+    import pandas as pd
 import numpy as np
+from profiling import profiled
 
 
-def load_components(path: str) -> pd.DataFrame:
+@profiled()
+def load_components(path: str) -> 'pd.DataFrame':
+    import pandas as pd
     df = pd.read_csv(path, dtype=str).fillna('')
     # Ensure expected columns exist; coerce types for numeric fields
     expected = ['component_id', 'role', 'os_type', 'layer', 'criticality', 'exposure_level', 'is_patched']
@@ -18,7 +24,9 @@ def load_components(path: str) -> pd.DataFrame:
     return df[expected]
 
 
-def load_dependencies(path: str) -> pd.DataFrame:
+@profiled()
+def load_dependencies(path: str) -> 'pd.DataFrame':
+    import pandas as pd
     df = pd.read_csv(path, dtype=str).fillna('')
     expected = ['source_component', 'target_component', 'dependency_type']
     for c in expected:
@@ -27,17 +35,23 @@ def load_dependencies(path: str) -> pd.DataFrame:
     return df[expected]
 
 
-def load_vulnerabilities(path: str) -> pd.DataFrame:
+@profiled()
+def load_vulnerabilities(path: str, keep_id_columns: bool = False) -> 'pd.DataFrame':
+    """keep_id_columns also keeps any VULN_ID_COLUMNS present in the file (for delta ingestion)."""
+    import pandas as pd
     df = pd.read_csv(path, dtype=str).fillna('')
     expected = ['component_id', 'cvss_score', 'attack_surface', 'access_vector']
     for c in expected:
         if c not in df.columns:
             df[c] = ''
     df['cvss_score'] = pd.to_numeric(df['cvss_score'], errors='coerce')
+    if keep_id_columns:
+        expected = expected + [c for c in VULN_ID_COLUMNS if c in df.columns]
     return df[expected]
 
 
-def aggregate_vuln_stats(vulns: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+@profiled()
+def aggregate_vuln_stats(vulns: 'pd.DataFrame') -> Dict[str, Dict[str, Any]]:
     """Return mapping: component_id -> stats dict (vuln_count, base_cvss_sum, max_cvss, mean_cvss)"""
     out = {}
     if vulns.empty:
@@ -54,7 +68,8 @@ def aggregate_vuln_stats(vulns: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
     return out
 
 
-def compute_degree_features(deps: pd.DataFrame, component_ids: List[str]) -> Dict[str, Dict[str, int]]:
+@profiled()
+def compute_degree_features(deps: 'pd.DataFrame', component_ids: List[str]) -> Dict[str, Dict[str, int]]:
     """Compute in-degree and out-degree (counting all dependency types)."""
     out = {cid: {'in_degree': 0, 'out_degree': 0} for cid in component_ids}
     for _, row in deps.iterrows():
@@ -67,16 +82,25 @@ def compute_degree_features(deps: pd.DataFrame, component_ids: List[str]) -> Dic
     return out
 
 
-def extract_features_from_csvs(components_csv: str, dependencies_csv: str, vulnerabilities_csv: str,
-                               fill_missing_criticality: Optional[int] = 1) -> pd.DataFrame:
-
+@profiled()
+def extract_features_from_csvs(components_csv: str, dependencies_csv: str, vulnerabilities_csv: Optional[str],
+                               fill_missing_criticality: Optional[int] = 1,
+                               vuln_stats: Optional[Dict[str, Dict[str, Any]]] = None) -> 'pd.DataFrame':
+    """vuln_stats (e.g. VulnerabilityDeltaIngestor.stats) replaces reading vulnerabilities_csv;
+    with neither, every component gets zero vulnerability stats."""
     comps = load_components(components_csv)
     deps = load_dependencies(dependencies_csv)
-    vulns = load_vulnerabilities(vulnerabilities_csv)
+    # already imported by the loaders, so this does not count towards the stage's own time
+    import pandas as pd
 
     component_ids = comps['component_id'].tolist()
     degree_map = compute_degree_features(deps, component_ids)
-    vuln_map = aggregate_vuln_stats(vulns)
+    if vuln_stats is not None:
+        vuln_map = vuln_stats
+    elif vulnerabilities_csv:
+        vuln_map = aggregate_vuln_stats(load_vulnerabilities(vulnerabilities_csv))
+    else:
+        vuln_map = {}
 
     rows = []
     for _, r in comps.iterrows():
@@ -106,3 +130,134 @@ def extract_features_from_csvs(components_csv: str, dependencies_csv: str, vulne
         if c not in df.columns:
             df[c] = 0.0
     return df.reset_index(drop=True)
+
+
+VULN_ID_COLUMNS = ['vuln_id', 'cve_id', 'cve']
+VULN_STAT_COLUMNS = ['vuln_count', 'base_cvss_sum', 'max_cvss', 'mean_cvss']
+_KEY_SEP = '\x1f'
+
+
+def vulnerability_keys(vulns: 'pd.DataFrame') -> 'pd.Series':
+    """Stable per-row key (component_id, vuln identity).
+
+    Identity is the first VULN_ID_COLUMNS column present in the feed, otherwise all
+    remaining columns (score included); repeated identities within a component are
+    numbered by occurrence so duplicates stay distinct. Without an id column a CVSS
+    change therefore shows up as a removal plus an addition on the same component.
+    """
+    id_cols = [c for c in VULN_ID_COLUMNS if c in vulns.columns][:1]
+    if not id_cols:
+        id_cols = [c for c in vulns.columns if c != 'component_id']
+    ident = vulns['component_id'].astype(str).fillna('')
+    for c in id_cols:
+        ident = ident + _KEY_SEP + vulns[c].astype(str).fillna('')
+    occurrence = ident.groupby(ident, sort=False).cumcount().astype(str)
+    return ident + _KEY_SEP + occurrence
+
+
+class VulnerabilityDeltaIngestor:
+    """Keeps the last ingested vulnerability snapshot and per-component aggregates.
+
+    ingest() diffs a new full feed against the snapshot and only touches components
+    with added, removed or re-scored rows. stats has the aggregate_vuln_stats layout.
+    """
+
+    def __init__(self):
+        import pandas as pd
+        self.snapshot = pd.Series(dtype=float)       # row key -> cvss_score
+        self._scores: Dict[str, Dict[str, float]] = {}  # component -> {row key: cvss_score}
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self.last_diff: Dict[str, int] = {}
+
+    def _remove(self, cid: str, key: str) -> None:
+        scores = self._scores[cid]
+        score = scores.pop(key)
+        st = self.stats[cid]
+        if not scores:
+            del self._scores[cid]
+            del self.stats[cid]
+            return
+        if math.isnan(score):
+            return
+        st['vuln_count'] -= 1
+        if score >= st['max_cvss']:
+            st['max_cvss'] = max((v for v in scores.values() if not math.isnan(v)), default=0.0)
+
+    def _add(self, cid: str, key: str, score: float) -> None:
+        scores = self._scores.setdefault(cid, {})
+        st = self.stats.setdefault(cid, {'vuln_count': 0, 'base_cvss_sum': 0.0, 'max_cvss': 0.0, 'mean_cvss': 0.0})
+        scores[key] = score
+        if math.isnan(score):
+            return
+        st['max_cvss'] = score if st['vuln_count'] == 0 else max(st['max_cvss'], score)
+        st['vuln_count'] += 1
+
+    @profiled()
+    def ingest(self, vulns: Union[str, 'pd.DataFrame']) -> Set[str]:
+        """Apply a full feed (path or vulnerability frame); returns the changed component ids."""
+        import pandas as pd
+        if not isinstance(vulns, pd.DataFrame):
+            vulns = load_vulnerabilities(vulns, keep_id_columns=True)
+        keys = vulnerability_keys(vulns)
+        # unparsable scores in a caller's frame count as NaN, as load_vulnerabilities makes them
+        scores = pd.to_numeric(vulns['cvss_score'], errors='coerce').astype(float)
+        new = pd.Series(scores.to_numpy(), index=keys.to_numpy())
+        old = self.snapshot
+
+        removed = old.index.difference(new.index)
+        added = new.index.difference(old.index)
+        common = new.index.intersection(old.index)
+        a, b = old.loc[common].to_numpy(), new.loc[common].to_numpy()
+        rescored = common[~((a == b) | (np.isnan(a) & np.isnan(b)))]
+
+        changed: Set[str] = set()
+        for key in removed.append(rescored):
+            cid = key.split(_KEY_SEP, 1)[0]
+            self._remove(cid, key)
+            changed.add(cid)
+        incoming = added.append(rescored)
+        for key, score in zip(incoming.tolist(), new.loc[incoming].tolist()):
+            cid = key.split(_KEY_SEP, 1)[0]
+            self._add(cid, key, float(score))
+            changed.add(cid)
+        for cid in changed:
+            st = self.stats.get(cid)
+            if st is not None:
+                # re-summing the touched component's scores keeps sums free of drift
+                vals = [v for v in self._scores[cid].values() if not math.isnan(v)]
+                st['base_cvss_sum'] = float(math.fsum(vals)) if vals else 0.0
+                st['mean_cvss'] = st['base_cvss_sum'] / len(vals) if vals else 0.0
+                if not vals:
+                    st['max_cvss'] = 0.0
+
+        self.snapshot = new
+        self.last_diff = {'added': len(added), 'removed': len(removed), 'rescored': len(rescored),
+                          'components_changed': len(changed)}
+        return changed
+
+    def component_stats(self, cid: str) -> Dict[str, Any]:
+        return dict(self.stats.get(cid, {'vuln_count': 0, 'base_cvss_sum': 0.0, 'max_cvss': 0.0, 'mean_cvss': 0.0}))
+
+    def update_features(self, features: 'pd.DataFrame', changed: Set[str]) -> 'pd.DataFrame':
+        """Rewrite the vulnerability columns of an extract_features_from_csvs frame for changed ids only."""
+        d = features.copy()
+        mask = d['component_id'].isin(changed)
+        if mask.any():
+            rows = [self.component_stats(cid) for cid in d.loc[mask, 'component_id']]
+            for c in VULN_STAT_COLUMNS:
+                d.loc[mask, c] = [r[c] for r in rows]
+        return d
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as fh:
+            pickle.dump({'snapshot': self.snapshot, 'scores': self._scores, 'stats': self.stats}, fh,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> 'VulnerabilityDeltaIngestor':
+        with open(path, 'rb') as fh:
+            state = pickle.load(fh)
+        obj = cls()
+        obj.snapshot, obj._scores, obj.stats = state['snapshot'], state['scores'], state['stats']
+        return obj
+
@@ -1,5 +1,12 @@
 
-from typing import Dict, Any, Iterable, List
+from typing import Dict, Any, Iterable, List, Optional, Tuple, TYPE_CHECKING
+import heapq
+import os
+import numpy as np
+from profiling import profiled
+from risk_scoring import round_array
+if TYPE_CHECKING:
+    from multiprocessing import shared_memory
 
 
 def compute_node_risk(component_attrs: Dict[str, Any],
@@ -24,6 +31,7 @@ def compute_node_risk(component_attrs: Dict[str, Any],
     }
 
 
+@profiled(rows=len)
 def aggregate_graph_risk(node_vuln_map, node_attrs_map):
     return {
         nid: compute_node_risk(node_attrs_map[nid], node_vuln_map.get(nid, []))
@@ -31,6 +39,7 @@ def aggregate_graph_risk(node_vuln_map, node_attrs_map):
     }
 
 
+@profiled(rows=len)
 def propagate_risk_simple(graph, node_risk_map):
     out = {}
     for n, r in node_risk_map.items():
@@ -38,3 +47,200 @@ def propagate_risk_simple(graph, node_risk_map):
         mean_pred = sum(node_risk_map[p]["node_risk_score"] for p in preds) / len(preds) if preds else 0.0
         out[n] = round(min(1.0, r["node_risk_score"] + 0.5 * mean_pred), 4)
     return out
+
+
+def unique_edges(src, dst):
+    """Drop duplicate (src, dst) index pairs, as a DiGraph would; first occurrence order is kept."""
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    if len(src) == 0:
+        return src, dst
+    n = int(max(src.max(), dst.max())) + 1
+    _, first = np.unique(src * n + dst, return_index=True)
+    first.sort()
+    return src[first], dst[first]
+
+
+def edge_index_arrays(ids, dependencies) -> Tuple[np.ndarray, np.ndarray]:
+    """De-duplicated integer (src, dst) arrays for a load_dependencies frame over components ids.
+
+    Edges to components absent from ids are dropped.
+    """
+    index = {cid: i for i, cid in enumerate(ids)}
+    src = dependencies['source_component'].map(index)
+    dst = dependencies['target_component'].map(index)
+    known = src.notna() & dst.notna()
+    return unique_edges(src[known].to_numpy(dtype=np.int64), dst[known].to_numpy(dtype=np.int64))
+
+
+def mean_predecessor_risk(r: np.ndarray, src, dst, n: Optional[int] = None) -> np.ndarray:
+    """Mean r[src] over the incoming edges of each node (0 without predecessors); dst in range(n)."""
+    n = len(r) if n is None else n
+    pred_sum = np.bincount(dst, weights=r[src], minlength=n)
+    pred_cnt = np.bincount(dst, minlength=n)
+    return np.divide(pred_sum, pred_cnt, out=np.zeros(n), where=pred_cnt > 0)
+
+
+@profiled()
+def propagate_risk_array(node_risk, src, dst) -> np.ndarray:
+    """Vectorized propagate_risk_simple over integer edge arrays (src -> dst).
+
+    node_risk[i] is the score of node i; edges must be de-duplicated (see unique_edges).
+    Predecessor sums run in edge order, while propagate_risk_simple sums in the order its
+    graph lists predecessors, so the two can differ by one unit in the 4th decimal after
+    rounding (e.g. 0.8563 vs 0.8562). propagate_risk_simple also needs predecessors() to
+    return a sized sequence (SimpleDiGraph), not a networkx iterator.
+    """
+    r = np.asarray(node_risk, dtype=float)
+    return round_array(np.minimum(1.0, r + 0.5 * mean_predecessor_risk(r, src, dst)))
+
+
+def _partition_labels(n: int, src: np.ndarray, dst: np.ndarray, n_parts: int, strategy: str) -> np.ndarray:
+    """Assign every node to one of n_parts partitions, balancing nodes + incoming edges."""
+    load = np.bincount(dst, minlength=n) + 1
+    if strategy == 'balanced':
+        bounds = np.searchsorted(np.cumsum(load), np.linspace(0, load.sum(), n_parts + 1)[1:-1])
+        return np.searchsorted(bounds, np.arange(n), side='right')
+    if strategy != 'components':
+        raise ValueError('Unknown partition strategy: ' + str(strategy))
+    import scipy.sparse as sp
+    from scipy.sparse.csgraph import connected_components
+    adj = sp.csr_matrix((np.ones(len(src), dtype=np.int8), (src, dst)), shape=(n, n))
+    n_comp, labels = connected_components(adj, directed=True, connection='weak')
+    comp_load = np.bincount(labels, weights=load, minlength=n_comp)
+    # longest-processing-time packing; ties broken by component id for determinism
+    heap = [(0.0, p) for p in range(n_parts)]
+    comp_part = np.empty(n_comp, dtype=np.int64)
+    for c in np.lexsort((np.arange(n_comp), -comp_load)):
+        w, p = heapq.heappop(heap)
+        comp_part[c] = p
+        heapq.heappush(heap, (w + comp_load[c], p))
+    return comp_part[labels]
+
+
+def _shared_array(arr: np.ndarray) -> Tuple['shared_memory.SharedMemory', Tuple]:
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return shm, (shm.name, arr.shape, arr.dtype.str)
+
+
+def _view(spec: Tuple, shm: 'shared_memory.SharedMemory') -> np.ndarray:
+    _, shape, dtype = spec
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _propagate_block(arrays: Dict[str, np.ndarray], node_range: Tuple[int, int], edge_range: Tuple[int, int]) -> None:
+    r = arrays['risk']
+    nodes = arrays['nodes'][node_range[0]:node_range[1]]
+    src = arrays['src'][edge_range[0]:edge_range[1]]
+    dst = arrays['dst'][edge_range[0]:edge_range[1]]
+    mean_pred = mean_predecessor_risk(r, src, dst, len(nodes))
+    arrays['out'][nodes] = round_array(np.minimum(1.0, r[nodes] + 0.5 * mean_pred))
+
+
+def _propagate_partition(specs: Dict[str, Tuple], node_range: Tuple[int, int], edge_range: Tuple[int, int]) -> None:
+    from multiprocessing import shared_memory
+    shms = {k: shared_memory.SharedMemory(name=spec[0]) for k, spec in specs.items()}
+    try:
+        # views live only for the duration of the call so the segments can be closed
+        _propagate_block({k: _view(spec, shms[k]) for k, spec in specs.items()}, node_range, edge_range)
+    finally:
+        for shm in shms.values():
+            shm.close()
+
+
+class PartitionPlan:
+    """Partitioning of one graph for propagate_risk_partitioned, built once and reused.
+
+    Holds the node and edge permutations, per-partition bounds and each edge's
+    destination as an offset into its partition's node block. The graph arrays are
+    copied into shared memory and the process pool is started on the first
+    propagate(); afterwards a call only copies the risk vector in and the result out.
+    Use as a context manager (or call close()) to release the pool and the segments.
+    """
+
+    @profiled('graph_utils.PartitionPlan.build')
+    def __init__(self, n: int, src, dst, n_parts: Optional[int] = None, strategy: str = 'components'):
+        src = np.ascontiguousarray(src, dtype=np.int64)
+        dst = np.ascontiguousarray(dst, dtype=np.int64)
+        self.n = int(n)
+        self.n_parts = n_parts or os.cpu_count() or 1
+        part = _partition_labels(self.n, src, dst, self.n_parts, strategy)
+        part = part.astype(np.min_scalar_type(max(self.n_parts - 1, 0)))
+        edge_part = part[dst]
+        # counting sort: a stable argsort over 8/16-bit keys is a single radix pass in NumPy
+        self.node_order = np.argsort(part, kind='stable')
+        edge_order = np.argsort(edge_part, kind='stable')
+        self.node_bounds = np.concatenate(([0], np.cumsum(np.bincount(part, minlength=self.n_parts))))
+        self.edge_bounds = np.concatenate(([0], np.cumsum(np.bincount(edge_part, minlength=self.n_parts))))
+        pos = np.empty(self.n, dtype=np.int64)
+        pos[self.node_order] = np.arange(self.n)
+        self.src = src[edge_order]
+        self.dst_local = pos[dst[edge_order]] - np.repeat(self.node_bounds[:-1], np.diff(self.edge_bounds))
+        self.tasks = [((int(self.node_bounds[p]), int(self.node_bounds[p + 1])),
+                       (int(self.edge_bounds[p]), int(self.edge_bounds[p + 1])))
+                      for p in range(self.n_parts) if self.node_bounds[p + 1] > self.node_bounds[p]]
+        self._shms: Dict[str, 'shared_memory.SharedMemory'] = {}
+        self._specs: Dict[str, Tuple] = {}
+        self._pool = None
+
+    def _start(self) -> None:
+        from concurrent.futures import ProcessPoolExecutor
+        for key, arr in (('risk', np.zeros(self.n)), ('nodes', self.node_order), ('src', self.src),
+                         ('dst', self.dst_local), ('out', np.zeros(self.n))):
+            self._shms[key], self._specs[key] = _shared_array(arr)
+        self._pool = ProcessPoolExecutor(max_workers=max(1, min(self.n_parts, len(self.tasks))))
+
+    def propagate(self, node_risk) -> np.ndarray:
+        r = np.asarray(node_risk, dtype=float)
+        if len(r) != self.n:
+            raise ValueError(f'node_risk has {len(r)} entries, plan was built for {self.n} nodes')
+        if self._pool is None:
+            self._start()
+        _view(self._specs['risk'], self._shms['risk'])[...] = r
+        for fut in [self._pool.submit(_propagate_partition, self._specs, nr, er) for nr, er in self.tasks]:
+            fut.result()
+        return _view(self._specs['out'], self._shms['out']).copy()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        for shm in self._shms.values():
+            shm.close()
+            shm.unlink()
+        self._shms, self._specs = {}, {}
+
+    def __enter__(self) -> 'PartitionPlan':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@profiled()
+def propagate_risk_partitioned(node_risk, src=None, dst=None, n_workers: Optional[int] = None,
+                               strategy: str = 'components', min_nodes: int = 200_000,
+                               plan: Optional[PartitionPlan] = None) -> np.ndarray:
+    """propagate_risk_array split over a process pool with shared-memory arrays.
+
+    Nodes are grouped into one partition per worker ('components' packs weakly
+    connected components, 'balanced' cuts contiguous node ranges); each worker owns
+    the edges pointing into its nodes. Edges keep their relative order, so every
+    predecessor sum is accumulated exactly as in the single-process version and the
+    result is bit-for-bit identical.
+
+    Pass a PartitionPlan to propagate the same graph repeatedly: partitioning,
+    shared-memory setup and pool start-up then happen once instead of on every call.
+    Without a plan, small graphs run in-process and larger ones build a throwaway plan.
+    """
+    if plan is not None:
+        return plan.propagate(node_risk)
+    r = np.ascontiguousarray(node_risk, dtype=float)
+    n_workers = n_workers or os.cpu_count() or 1
+    if n_workers <= 1 or len(r) < min_nodes:
+        return propagate_risk_array(r, src, dst)
+    with PartitionPlan(len(r), src, dst, n_workers, strategy) as tmp:
+        return tmp.propagate(r)
+
@@ -1,12 +1,16 @@
 
-from typing import List, Optional, Dict
-import pandas as pd
+from typing import List, Optional, Dict, TYPE_CHECKING
+if TYPE_CHECKING:
+    import pandas as pd
 import numpy as np
+from profiling import profiled
 
 
-def impute_missing(df: pd.DataFrame, numeric_columns: List[str], strategy: str = 'median',
-                   fill_value: Optional[float] = None) -> pd.DataFrame:
+@profiled()
+def impute_missing(df: 'pd.DataFrame', numeric_columns: List[str], strategy: str = 'median',
+                   fill_value: Optional[float] = None) -> 'pd.DataFrame':
 
+    import pandas as pd
     d = df.copy()
     for col in numeric_columns:
         if col not in d.columns:
@@ -27,8 +31,10 @@ def impute_missing(df: pd.DataFrame, numeric_columns: List[str], strategy: str =
     return d
 
 
-def min_max_scale(df: pd.DataFrame, numeric_columns: List[str], clip: bool = True) -> pd.DataFrame:
+@profiled()
+def min_max_scale(df: 'pd.DataFrame', numeric_columns: List[str], clip: bool = True) -> 'pd.DataFrame':
 
+    import pandas as pd
     d = df.copy()
     for col in numeric_columns:
         if col not in d.columns:
@@ -46,7 +52,9 @@ def min_max_scale(df: pd.DataFrame, numeric_columns: List[str], clip: bool = Tru
     return d
 
 
-def zscore_scale(df: pd.DataFrame, numeric_columns: List[str], clip_std: Optional[float] = None) -> pd.DataFrame:
+@profiled()
+def zscore_scale(df: 'pd.DataFrame', numeric_columns: List[str], clip_std: Optional[float] = None) -> 'pd.DataFrame':
+    import pandas as pd
     d = df.copy()
     for col in numeric_columns:
         if col not in d.columns:
@@ -1,9 +1,13 @@
 
 from typing import List, Dict, Any, Tuple
-from risk_scoring import estimate_risk_reduction_if_patched, compute_node_risk
+import numpy as np
+from risk_scoring import (estimate_risk_reduction_if_patched, compute_node_risk,
+                          compute_node_risk_array, estimate_risk_reduction_array)
+from profiling import profiled
 
 EPS = 1e-6
 
+@profiled()
 def rank_by_roi(components: List[Dict[str, Any]],
                 vuln_map: Dict[str, Dict[str, Any]],
                 cost_map: Dict[str, float],
@@ -33,6 +37,7 @@ def rank_by_roi(components: List[Dict[str, Any]],
         return rows[:top_k]
     return rows
 
+@profiled()
 def rank_by_absolute_risk(components: List[Dict[str, Any]],
                           vuln_map: Dict[str, Dict[str, Any]],
                           weights: Dict[str, float] = None,
@@ -51,3 +56,42 @@ def rank_by_absolute_risk(components: List[Dict[str, Any]],
     if top_k is not None:
         return rows[:top_k]
     return rows
+
+def rank_by_roi_arrays(component_ids, criticality, base_cvss_sum, exposure_levels, is_patched, vuln_count,
+                       cost, weights: Dict[str, float] = None,
+                       patch_effectiveness: float = 0.6,
+                       top_k: int = None) -> List[Dict[str, Any]]:
+    """rank_by_roi over column arrays (NumPy only); same rows and ordering."""
+    est = estimate_risk_reduction_array(criticality, base_cvss_sum, exposure_levels, is_patched,
+                                        weights, patch_effectiveness)
+    cost = np.asarray(cost, dtype=float)
+    vuln_count = np.asarray(vuln_count, dtype=np.int64)
+    roi = est['absolute_reduction'] / (cost + EPS)
+    order = np.lexsort((-est['current_risk'], -est['absolute_reduction'], -roi))
+    if top_k is not None:
+        order = order[:top_k]
+    return [{
+        'component_id': component_ids[i],
+        'current_risk': float(est['current_risk'][i]),
+        'post_patch_risk': float(est['post_patch_risk'][i]),
+        'absolute_reduction': float(est['absolute_reduction'][i]),
+        'cost': float(cost[i]),
+        'roi': float(roi[i]),
+        'vuln_count': int(vuln_count[i])
+    } for i in order.tolist()]
+
+def rank_by_absolute_risk_arrays(component_ids, criticality, base_cvss_sum, exposure_levels, is_patched,
+                                 vuln_count, weights: Dict[str, float] = None,
+                                 top_k: int = None) -> List[Dict[str, Any]]:
+    """rank_by_absolute_risk over column arrays (NumPy only); same rows and ordering."""
+    risk = compute_node_risk_array(criticality, base_cvss_sum, exposure_levels, is_patched, weights)
+    vuln_count = np.asarray(vuln_count, dtype=np.int64)
+    order = np.lexsort((-vuln_count, -risk))
+    if top_k is not None:
+        order = order[:top_k]
+    return [{
+        'component_id': component_ids[i],
+        'current_risk': float(risk[i]),
+        'vuln_count': int(vuln_count[i])
+    } for i in order.tolist()]
+
@@ -0,0 +1,354 @@
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import pickle
+import threading
+
+from profiling import stage as profile_stage
+
+
+def _hash_file(path: Path, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(chunk), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _hash_value(value: Any) -> str:
+    if isinstance(value, (str, Path)) and Path(value).is_file():
+        return 'file:' + _hash_file(Path(value))
+    try:
+        payload = json.dumps(value, sort_keys=True).encode('utf-8')
+    except (TypeError, ValueError):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    return hashlib.sha256(payload).hexdigest()
+
+
+_MODULE_HASHES: Dict[tuple, str] = {}
+
+
+def _module_identity(module: str) -> str:
+    """Hash of a module's source file (cached per path and mtime)."""
+    spec = importlib.util.find_spec(module)
+    origin = getattr(spec, 'origin', None)
+    if not origin or not os.path.isfile(origin):
+        return module + ':unknown'
+    key = (origin, os.stat(origin).st_mtime_ns)
+    if key not in _MODULE_HASHES:
+        _MODULE_HASHES[key] = _hash_file(Path(origin))
+    return module + ':' + _MODULE_HASHES[key]
+
+
+def _func_identity(func: Callable, code_modules: Sequence[str] = ()) -> str:
+    """Function name and source plus the full source of its module and of every code_modules entry,
+    so edits to the code a stage calls (or to module constants) change its fingerprint."""
+    module = getattr(func, '__module__', '') or ''
+    name = f'{module}.{getattr(func, "__qualname__", repr(func))}'
+    try:
+        src = inspect.getsource(func)
+    except (OSError, TypeError):
+        src = ''
+    parts = [name + ':' + hashlib.sha256(src.encode('utf-8')).hexdigest()]
+    for m in ([module] if module else []) + sorted(set(code_modules) - {module}):
+        parts.append(_module_identity(m))
+    return '|'.join(parts)
+
+
+class Stage:
+    def __init__(self, name: str, func: Callable, inputs: Sequence[str] = (), params: Dict[str, Any] = None,
+                 code_modules: Sequence[str] = ()):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = dict(params or {})
+        self.code_modules = list(code_modules)
+
+    def run(self, input_values: List[Any]) -> Any:
+        return self.func(*input_values, **self.params)
+
+
+class Pipeline:
+    """Declarative DAG of stages with fingerprint-keyed memoization.
+
+    A stage's fingerprint covers its function (name and source), the source files
+    of its module and of the code_modules it calls, its parameters and the
+    fingerprints of its inputs; sources are fingerprinted by file content
+    (for paths) or by value. Only stages whose fingerprint changed are recomputed,
+    and stages whose inputs are ready run concurrently in a thread pool.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_workers: Optional[int] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_workers = max_workers
+        self.sources: Dict[str, Any] = {}
+        self.stages: Dict[str, Stage] = {}
+        self._memo: Dict[str, Any] = {}    # fingerprint -> output
+        self._lock = threading.Lock()
+        self.last_run: Dict[str, str] = {}
+
+    def add_source(self, name: str, value: Any) -> 'Pipeline':
+        if name in self.stages:
+            raise ValueError(f'{name!r} is already a stage')
+        self.sources[name] = value
+        return self
+
+    def add_stage(self, name: str, func: Callable, inputs: Sequence[str] = (),
+                  params: Dict[str, Any] = None, code_modules: Sequence[str] = ()) -> 'Pipeline':
+        if name in self.sources or name in self.stages:
+            raise ValueError(f'Duplicate node name: {name!r}')
+        self.stages[name] = Stage(name, func, inputs, params, code_modules)
+        return self
+
+    def set_params(self, name: str, **params) -> 'Pipeline':
+        self.stages[name].params.update(params)
+        return self
+
+    def _dependencies(self, targets: Iterable[str]) -> List[str]:
+        """Stages needed for targets, in a valid execution order."""
+        order, state = [], {}
+
+        def visit(n):
+            if n in self.sources:
+                return
+            if n not in self.stages:
+                raise KeyError(f'Unknown pipeline node: {n!r}')
+            if state.get(n) == 'done':
+                return
+            if state.get(n) == 'active':
+                raise ValueError(f'Pipeline has a cycle through {n!r}')
+            state[n] = 'active'
+            for i in self.stages[n].inputs:
+                visit(i)
+            state[n] = 'done'
+            order.append(n)
+
+        for t in targets:
+            visit(t)
+        return order
+
+    def fingerprints(self, targets: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        targets = list(targets) if targets is not None else list(self.stages)
+        fps = {}
+        for name in self._dependencies(targets):
+            st = self.stages[name]
+            h = hashlib.sha256()
+            h.update(name.encode('utf-8'))
+            h.update(_func_identity(st.func, st.code_modules).encode('utf-8'))
+            h.update(_hash_value(st.params).encode('utf-8'))
+            for i in st.inputs:
+                if i in self.sources:
+                    if i not in fps:
+                        fps[i] = _hash_value(self.sources[i])
+                h.update(fps[i].encode('utf-8'))
+            fps[name] = h.hexdigest()
+        return fps
+
+    def _cache_path(self, name: str, fp: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f'{name}-{fp[:32]}.pkl'
+
+    def _load(self, name: str, fp: str):
+        with self._lock:
+            if fp in self._memo:
+                return True, self._memo[fp], 'memory'
+        path = self._cache_path(name, fp)
+        if path is not None and path.exists():
+            try:
+                with open(path, 'rb') as fh:
+                    value = pickle.load(fh)
+                with self._lock:
+                    self._memo[fp] = value
+                return True, value, 'disk'
+            except Exception:
+                pass
+        return False, None, None
+
+    def _store(self, name: str, fp: str, value: Any) -> None:
+        with self._lock:
+            self._memo[fp] = value
+        path = self._cache_path(name, fp)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp, 'wb') as fh:
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def _execute(self, name: str, fp: str, input_values: List[Any]):
+        with profile_stage(f'pipeline.{name}'):
+            value = self.stages[name].run(input_values)
+        self._store(name, fp, value)
+        return value
+
+    def run(self, targets: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Evaluate targets (default: every stage) lazily; returns outputs keyed by stage."""
+        targets = list(targets) if targets is not None else list(self.stages)
+        order = self._dependencies(targets)
+        fps = self.fingerprints(targets)
+        results: Dict[str, Any] = {}
+        status: Dict[str, str] = {}
+
+        # Stages already cached need not pull in their own inputs; resolve top-down.
+        needed = set()
+        for name in reversed(order):
+            if name not in targets and not any(name in self.stages[c].inputs for c in needed):
+                continue
+            hit, value, where = self._load(name, fps[name])
+            if hit:
+                results[name] = value
+                status[name] = where
+            else:
+                needed.add(name)
+
+        pending = [n for n in order if n in needed]
+        for name, value in self.sources.items():
+            results.setdefault(name, value)
+
+        def ready(n):
+            return all(i in results for i in self.stages[n].inputs)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while pending or running:
+                for n in [n for n in pending if ready(n)]:
+                    pending.remove(n)
+                    args = [results[i] for i in self.stages[n].inputs]
+                    running[pool.submit(self._execute, n, fps[n], args)] = n
+                if not running:
+                    raise RuntimeError('Pipeline stalled; unresolved inputs for ' + ', '.join(pending))
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    n = running.pop(fut)
+                    results[n] = fut.result()
+                    status[n] = 'computed'
+
+        self.last_run = status
+        return {t: results[t] for t in targets}
+
+    def get(self, name: str) -> Any:
+        return self.run([name])[name]
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memo.clear()
+
+
+# --- Default stages: raw CSVs -> features -> encoded/scaled matrix -> risk -> ranking/explanations ---
+
+def _encode_stage(features, categorical_columns, boolean_columns):
+    from encoding import one_hot_encode, label_encode_boolean
+    encoded, _ = one_hot_encode(features, categorical_columns)
+    return label_encode_boolean(encoded, boolean_columns)
+
+
+def _scale_stage(encoded, numeric_columns, impute_strategy, scaler):
+    from normalization import impute_missing, min_max_scale, zscore_scale
+    d = impute_missing(encoded, numeric_columns, strategy=impute_strategy)
+    if scaler == 'minmax':
+        return min_max_scale(d, numeric_columns)
+    if scaler == 'zscore':
+        return zscore_scale(d, numeric_columns)
+    if scaler in (None, 'none'):
+        return d
+    raise ValueError('Unknown scaler: ' + str(scaler))
+
+
+def _risk_stage(features, weights):
+    import pandas as pd
+    from risk_scoring import compute_node_risk
+    rows = []
+    for rec in features.to_dict(orient='records'):
+        r = compute_node_risk(rec, rec, weights)
+        r['component_id'] = rec['component_id']
+        rows.append(r)
+    return pd.DataFrame(rows)
+
+
+def _propagation_stage(node_risk, dependencies):
+    from graph_utils import edge_index_arrays, propagate_risk_array
+    ids = node_risk['component_id'].tolist()
+    # edges to components absent from the inventory are dropped, as in the service, CLI and explanations
+    src, dst = edge_index_arrays(ids, dependencies)
+    propagated = propagate_risk_array(node_risk['node_risk'].to_numpy(dtype=float), src, dst)
+    return dict(zip(ids, propagated.tolist()))
+
+
+def _ranking_stage(features, cost_map, weights, patch_effectiveness, top_k):
+    from patch_ranking import rank_by_roi
+    records = features.to_dict(orient='records')
+    vuln_map = {r['component_id']: r for r in records}
+    return rank_by_roi(records, vuln_map, cost_map or {}, weights=weights,
+                       patch_effectiveness=patch_effectiveness, top_k=top_k)
+
+
+def _risk_explanation_stage(features, dependencies, weights, propagated):
+    # model_output is unrounded, so it differs from propagated_risk by up to 1e-4
+    from risk_attribution import explain_risk_scores
+    return explain_risk_scores(features, dependencies, weights=weights, propagated=propagated)
+
+
+def _explain_stage(model, scaled, feature_columns):
+    from shap_computation import compute_shap_or_permutation
+    X = scaled[feature_columns]
+    return compute_shap_or_permutation(model, X, feature_names=feature_columns)
+
+
+def build_default_pipeline(components_csv: str, dependencies_csv: str, vulnerabilities_csv: str,
+                           cost_map: Optional[Dict[str, float]] = None,
+                           model: Any = None,
+                           feature_columns: Optional[List[str]] = None,
+                           categorical_columns: Sequence[str] = ('role', 'os_type', 'layer', 'exposure_level'),
+                           boolean_columns: Sequence[str] = ('is_patched',),
+                           numeric_columns: Sequence[str] = ('criticality', 'in_degree', 'out_degree', 'vuln_count',
+                                                             'base_cvss_sum', 'max_cvss', 'mean_cvss'),
+                           weights: Optional[Dict[str, float]] = None,
+                           patch_effectiveness: float = 0.6,
+                           top_k: Optional[int] = None,
+                           impute_strategy: str = 'median',
+                           scaler: str = 'minmax',
+                           cache_dir: Optional[str] = '.pipeline_cache',
+                           max_workers: Optional[int] = None) -> Pipeline:
+    """Wire the standard stages; 'explanations' is only added when a model is supplied."""
+    from feature_extraction import extract_features_from_csvs, load_dependencies
+    from risk_scoring import DEFAULT_WEIGHTS
+
+    # concrete values, so a change to DEFAULT_WEIGHTS changes the fingerprints
+    weights = dict(weights or DEFAULT_WEIGHTS)
+    p = Pipeline(cache_dir=cache_dir, max_workers=max_workers)
+    p.add_source('components_csv', str(components_csv))
+    p.add_source('dependencies_csv', str(dependencies_csv))
+    p.add_source('vulnerabilities_csv', str(vulnerabilities_csv))
+    p.add_stage('features', extract_features_from_csvs,
+                ['components_csv', 'dependencies_csv', 'vulnerabilities_csv'])
+    p.add_stage('dependencies', load_dependencies, ['dependencies_csv'])
+    p.add_stage('encoded', _encode_stage, ['features'],
+                {'categorical_columns': list(categorical_columns), 'boolean_columns': list(boolean_columns)},
+                code_modules=['encoding'])
+    p.add_stage('scaled', _scale_stage, ['encoded'],
+                {'numeric_columns': list(numeric_columns), 'impute_strategy': impute_strategy, 'scaler': scaler},
+                code_modules=['normalization'])
+    p.add_stage('node_risk', _risk_stage, ['features'], {'weights': weights}, code_modules=['risk_scoring'])
+    p.add_stage('propagated_risk', _propagation_stage, ['node_risk', 'dependencies'],
+                code_modules=['graph_utils', 'risk_scoring'])
+    p.add_stage('ranking', _ranking_stage, ['features'],
+                {'cost_map': cost_map, 'weights': weights,
+                 'patch_effectiveness': patch_effectiveness, 'top_k': top_k},
+                code_modules=['patch_ranking', 'risk_scoring'])
+    p.add_stage('risk_explanations', _risk_explanation_stage, ['features', 'dependencies'],
+                {'weights': weights, 'propagated': True},
+                code_modules=['risk_attribution', 'risk_scoring', 'graph_utils'])
+    if model is not None:
+        p.add_source('model', model)
+        p.add_stage('explanations', _explain_stage, ['model', 'scaled'],
+                    {'feature_columns': feature_columns or list(numeric_columns)},
+                    code_modules=['shap_computation'])
+    return p
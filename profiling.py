@@ -0,0 +1,255 @@
+
+from typing import Any, Callable, Dict, List, Optional
+from contextlib import contextmanager
+from pathlib import Path
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Set to a file path to profile a whole process (e.g. a trainer launched by run_experiment).
+PROFILE_ENV_VAR = 'XSEC_DT_PROFILE'
+
+_PROFILER: Optional['Profiler'] = None
+
+
+def _count_rows(obj: Any) -> Optional[int]:
+    # a dict of result columns is not a row count; such functions pass rows= to profiled()
+    if isinstance(obj, dict):
+        return None
+    if isinstance(obj, tuple) and obj:
+        obj = obj[0]
+    shape = getattr(obj, 'shape', None)
+    if shape:
+        return int(shape[0])
+    try:
+        return len(obj)
+    except Exception:
+        return None
+
+
+class StageRecord:
+    __slots__ = ('name', 'start', 'end', 'rows', 'peak_bytes', 'thread', 'depth', 'meta', '_mem_start', '_peak_seen')
+
+    def __init__(self, name: str, depth: int, meta: Dict[str, Any]):
+        self.name = name
+        self.start = 0.0
+        self.end = 0.0
+        self.rows: Optional[int] = None
+        self.peak_bytes: Optional[int] = None
+        self.thread = threading.get_ident()
+        self.depth = depth
+        self.meta = meta
+        self._mem_start = 0
+        self._peak_seen = 0
+
+    def set_rows(self, n: Optional[int]) -> None:
+        self.rows = None if n is None else int(n)
+
+    def to_dict(self, t0: float) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'start_ms': round((self.start - t0) * 1e3, 3),
+            'duration_ms': round((self.end - self.start) * 1e3, 3),
+            'rows': self.rows,
+            'peak_mem_bytes': self.peak_bytes,
+            'thread': self.thread,
+            'depth': self.depth,
+            'meta': self.meta
+        }
+
+
+class _NullStage:
+    """Shared no-op record handed out while profiling is disabled."""
+
+    def set_rows(self, n: Optional[int]) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Profiler:
+    """Collects wall time, peak traced memory and row counts per pipeline stage.
+
+    Memory figures come from tracemalloc, which is process-wide; stages running
+    concurrently in threads therefore report overlapping peaks.
+    """
+
+    def __init__(self, track_memory: bool = True):
+        self.track_memory = track_memory
+        self.records: List[StageRecord] = []
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracemalloc = False
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def close(self) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _stack(self) -> List[StageRecord]:
+        st = getattr(self._local, 'stack', None)
+        if st is None:
+            st = self._local.stack = []
+        return st
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None, **meta):
+        stack = self._stack()
+        rec = StageRecord(name, len(stack), meta)
+        rec.set_rows(rows)
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]._peak_seen = max(stack[-1]._peak_seen, peak)
+            tracemalloc.reset_peak()
+            rec._mem_start = current
+        stack.append(rec)
+        rec.start = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec.end = time.perf_counter()
+            stack.pop()
+            if self.track_memory:
+                peak = max(rec._peak_seen, tracemalloc.get_traced_memory()[1])
+                rec.peak_bytes = max(0, peak - rec._mem_start)
+                if stack:
+                    stack[-1]._peak_seen = max(stack[-1]._peak_seen, peak)
+            with self._lock:
+                self.records.append(rec)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for rec in self.records:
+            s = out.setdefault(rec.name, {'calls': 0, 'total_ms': 0.0, 'max_peak_mem_bytes': None, 'rows': 0})
+            s['calls'] += 1
+            s['total_ms'] = round(s['total_ms'] + (rec.end - rec.start) * 1e3, 3)
+            if rec.peak_bytes is not None:
+                s['max_peak_mem_bytes'] = max(s['max_peak_mem_bytes'] or 0, rec.peak_bytes)
+            if rec.rows is not None:
+                s['rows'] += rec.rows
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        recs = sorted(self.records, key=lambda r: r.start)
+        return {
+            'pid': os.getpid(),
+            'track_memory': self.track_memory,
+            'stages': [r.to_dict(self._t0) for r in recs],
+            'summary': self.summary()
+        }
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Return the trace in Chrome trace-event format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        events = []
+        for r in sorted(self.records, key=lambda r: r.start):
+            args = {'rows': r.rows, 'peak_mem_bytes': r.peak_bytes}
+            args.update(r.meta)
+            events.append({
+                'name': r.name,
+                'cat': r.name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': round((r.start - self._t0) * 1e6, 1),
+                'dur': round((r.end - r.start) * 1e6, 1),
+                'pid': pid,
+                'tid': r.thread,
+                'args': args
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_json(self, path) -> None:
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2, default=str), encoding='utf-8')
+
+    def write_chrome_trace(self, path) -> None:
+        Path(path).write_text(json.dumps(self.to_chrome_trace(), default=str), encoding='utf-8')
+
+
+def chrome_trace_path(path) -> Path:
+    p = Path(path)
+    return p.with_name(p.stem + '.chrome.json')
+
+
+def enable(track_memory: bool = True) -> Profiler:
+    global _PROFILER
+    if _PROFILER is None:
+        _PROFILER = Profiler(track_memory=track_memory)
+    return _PROFILER
+
+
+def disable() -> Optional[Profiler]:
+    """Stop profiling and return the collected profiler (if any)."""
+    global _PROFILER
+    prof, _PROFILER = _PROFILER, None
+    if prof is not None:
+        prof.close()
+    return prof
+
+
+def get_profiler() -> Optional[Profiler]:
+    return _PROFILER
+
+
+def is_enabled() -> bool:
+    return _PROFILER is not None
+
+
+def stage(name: str, rows: Optional[int] = None, **meta):
+    """Context manager timing a block; a shared no-op when profiling is off."""
+    prof = _PROFILER
+    if prof is None:
+        return _NULL_STAGE
+    return prof.stage(name, rows=rows, **meta)
+
+
+def profiled(name: Optional[str] = None, rows: Optional[Callable[[Any], Optional[int]]] = None) -> Callable:
+    """Decorator recording each call as a stage; row count is rows(result), else taken from the result."""
+    count_rows = rows or _count_rows
+
+    def deco(func: Callable) -> Callable:
+        stage_name = name or f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            prof = _PROFILER
+            if prof is None:
+                return func(*args, **kwargs)
+            with prof.stage(stage_name) as rec:
+                result = func(*args, **kwargs)
+                rec.set_rows(count_rows(result))
+                return result
+
+        return wrapper
+
+    return deco
+
+
+def _dump_on_exit(path: str) -> None:
+    prof = disable()
+    if prof is None:
+        return
+    try:
+        prof.write_json(path)
+        prof.write_chrome_trace(chrome_trace_path(path))
+    except Exception:
+        pass
+
+
+if os.environ.get(PROFILE_ENV_VAR):
+    enable()
+    atexit.register(_dump_on_exit, os.environ[PROFILE_ENV_VAR])
@@ -0,0 +1,312 @@
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import bisect
+import heapq
+import math
+
+from profiling import profiled
+from risk_scoring import EXPOSURE_MAP
+
+
+class ReachabilityIndex:
+    """Transitive-closure index over the SCC condensation of a dependency graph.
+
+    SCCs are numbered in topological order, so every SCC reachable from SCC c has a
+    larger id; reach[c] is a Python int bitset where bit k means "SCC c + k is
+    reachable". Reachability is one bit test, blast radius a popcount.
+
+    Each weakly connected component gets a contiguous block of SCC ids, whatever
+    the registry order of its nodes, so a reach set never spans SCCs of unrelated
+    environments and memory stays bounded by the environment sizes.
+
+    Edge insertions between existing nodes of the same block that keep the
+    topological numbering are applied incrementally (OR into the ancestors of the
+    source), as are deletions between different SCCs (ancestors recomputed
+    bottom-up). New nodes, insertions that join two blocks, close a cycle or break
+    the numbering, and deletions inside an SCC trigger a rebuild on the next query.
+    """
+
+    def __init__(self, nodes: Iterable[Any] = (), edges: Iterable[Tuple[Any, Any]] = ()):
+        self.nodes: List[Any] = []
+        self.index: Dict[Any, int] = {}
+        self._succ: List[Set[int]] = []
+        for n in nodes:
+            self._add_node(n)
+        for u, v in edges:
+            self._succ[self._add_node(u)].add(self._add_node(v))
+        self._dirty = True
+        self.rebuilds = 0
+
+    @classmethod
+    def from_graph(cls, graph) -> 'ReachabilityIndex':
+        """Build from SimpleDiGraph, SparseDependencyGraph, networkx.DiGraph or anything exposing nodes / successors()."""
+        nodes = list(graph.nodes)
+        if hasattr(graph, 'edge_arrays'):
+            # SparseDependencyGraph: edges are already integer-coded in node order
+            idx = cls(nodes)
+            for u, v in zip(*(a.tolist() for a in graph.edge_arrays())):
+                idx._succ[u].add(v)
+            return idx
+        return cls(nodes, ((u, v) for u in nodes for v in graph.successors(u)))
+
+    def _add_node(self, n) -> int:
+        i = self.index.get(n)
+        if i is None:
+            i = self.index[n] = len(self.nodes)
+            self.nodes.append(n)
+            self._succ.append(set())
+            self._dirty = True
+        return i
+
+    # --- construction ---
+
+    def _tarjan(self) -> List[List[int]]:
+        """Iterative Tarjan; SCCs come out in reverse topological order."""
+        n = len(self.nodes)
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack: List[int] = []
+        sccs: List[List[int]] = []
+        counter = 0
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            work = [(root, iter(self._succ[root]))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                v, it = work[-1]
+                advanced = False
+                for w in it:
+                    if index[w] == -1:
+                        index[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append((w, iter(self._succ[w])))
+                        advanced = True
+                        break
+                    if on_stack[w] and index[w] < low[v]:
+                        low[v] = index[w]
+                if advanced:
+                    continue
+                work.pop()
+                if work and low[v] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[v]
+                if low[v] == index[v]:
+                    comp = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        comp.append(w)
+                        if w == v:
+                            break
+                    sccs.append(comp)
+        return sccs
+
+    def _weak_components(self) -> List[int]:
+        """Union-find label (root node index) of each node's weakly connected component."""
+        parent = list(range(len(self.nodes)))
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for u, succ in enumerate(self._succ):
+            for v in succ:
+                ru, rv = find(u), find(v)
+                if ru != rv:
+                    parent[ru] = rv
+        return [find(x) for x in range(len(parent))]
+
+    @profiled('reachability.build')
+    def _rebuild(self) -> None:
+        sccs = self._tarjan()
+        sccs.reverse()   # topological order: sources first
+        # stable sort keeps topological order inside each weak component and makes its ids contiguous
+        wcc = self._weak_components()
+        sccs.sort(key=lambda members: wcc[members[0]])
+        self.comp_block = [wcc[members[0]] for members in sccs]
+        self.comp = [0] * len(self.nodes)
+        for c, members in enumerate(sccs):
+            for v in members:
+                self.comp[v] = c
+        self.comp_size = [len(m) for m in sccs]
+        self.comp_succ: List[Dict[int, int]] = [dict() for _ in sccs]
+        for u, succ in enumerate(self._succ):
+            cu = self.comp[u]
+            for v in succ:
+                cv = self.comp[v]
+                if cv != cu:
+                    self.comp_succ[cu][cv] = self.comp_succ[cu].get(cv, 0) + 1
+        self.reach: List[int] = [0] * len(sccs)
+        for c in range(len(sccs) - 1, -1, -1):
+            self.reach[c] = self._closure_of(c)
+        self._nontrivial = [c for c, s in enumerate(self.comp_size) if s > 1]   # sorted, for bisect
+        self._dirty = False
+        self.rebuilds += 1
+
+    def _closure_of(self, c: int) -> int:
+        r = 1
+        for d in self.comp_succ[c]:
+            r |= self.reach[d] << (d - c)
+        return r
+
+    def _ensure(self) -> None:
+        if self._dirty:
+            self._rebuild()
+
+    # --- queries ---
+
+    def _comp_reaches(self, cu: int, cv: int) -> bool:
+        return cv >= cu and (self.reach[cu] >> (cv - cu)) & 1 == 1
+
+    def reachable(self, u, v) -> bool:
+        """True if v can be reached from u (every node reaches itself)."""
+        self._ensure()
+        return self._comp_reaches(self.comp[self.index[u]], self.comp[self.index[v]])
+
+    def blast_radius(self, u) -> int:
+        """Number of other nodes reachable from u."""
+        self._ensure()
+        cu = self.comp[self.index[u]]
+        r = self.reach[cu]
+        count = r.bit_count()
+        # only SCCs inside the bit range of r can be reachable
+        lo = bisect.bisect_left(self._nontrivial, cu)
+        hi = bisect.bisect_left(self._nontrivial, cu + r.bit_length())
+        for s in self._nontrivial[lo:hi]:
+            if (r >> (s - cu)) & 1:
+                count += self.comp_size[s] - 1
+        return count - 1
+
+    def _reach_mask(self, sources: Iterable[Any]) -> int:
+        mask = 0
+        for s in sources:
+            cs = self.comp[self.index[s]]
+            mask |= self.reach[cs] << cs
+        return mask
+
+    def descendants(self, u) -> List[Any]:
+        self._ensure()
+        mask = self._reach_mask([u])
+        iu = self.index[u]
+        return [n for i, n in enumerate(self.nodes) if i != iu and (mask >> self.comp[i]) & 1]
+
+    def reachable_targets(self, sources: Iterable[Any], targets: Iterable[Any]) -> List[Any]:
+        """Targets reachable from at least one source."""
+        self._ensure()
+        mask = self._reach_mask(s for s in sources if s in self.index)
+        return [t for t in targets if t in self.index and (mask >> self.comp[self.index[t]]) & 1]
+
+    def exposed_critical_assets(self, exposure: Dict[Any, str], criticality: Dict[Any, float],
+                                min_criticality: float = 4, entry_level: str = 'internet-facing') -> Dict[Any, List[Any]]:
+        """Critical assets reachable from entry_level components, mapped to the entry points reaching them."""
+        if entry_level not in EXPOSURE_MAP:
+            raise ValueError('Unknown exposure level: ' + str(entry_level))
+        self._ensure()
+        entries = [n for n, e in exposure.items() if str(e).lower() == entry_level and n in self.index]
+        critical = [n for n, c in criticality.items() if n in self.index and float(c) >= min_criticality]
+        out: Dict[Any, List[Any]] = {}
+        for s in entries:
+            cs = self.comp[self.index[s]]
+            for t in critical:
+                if t != s and self._comp_reaches(cs, self.comp[self.index[t]]):
+                    out.setdefault(t, []).append(s)
+        return out
+
+    def most_probable_path(self, source, target, node_risk: Dict[Any, float]) -> Optional[Dict[str, Any]]:
+        """Path maximizing the product of node risks (source and target included).
+
+        Dijkstra on -log(risk), expanding only nodes from which the target is reachable.
+        Nodes with zero risk are impassable. Returns None when no such path exists.
+        """
+        self._ensure()
+        if not self.reachable(source, target):
+            return None
+        it = self.index[target]
+        ct = self.comp[it]
+
+        def cost(i):
+            r = float(node_risk.get(self.nodes[i], 0.0))
+            return -math.log(r) if r > 0 else math.inf
+
+        si = self.index[source]
+        start = cost(si)
+        if math.isinf(start):
+            return None
+        dist = {si: start}
+        prev: Dict[int, int] = {}
+        heap = [(start, si)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u == it:
+                break
+            if d > dist.get(u, math.inf):
+                continue
+            for v in self._succ[u]:
+                if not self._comp_reaches(self.comp[v], ct):
+                    continue
+                nd = d + cost(v)
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    prev[v] = u
+                    heapq.heappush(heap, (nd, v))
+        if it not in dist or math.isinf(dist[it]):
+            return None
+        path = [it]
+        while path[-1] != si:
+            path.append(prev[path[-1]])
+        path.reverse()
+        return {'path': [self.nodes[i] for i in path], 'probability': math.exp(-dist[it])}
+
+    # --- incremental maintenance ---
+
+    def add_edge(self, u, v) -> None:
+        known = u in self.index and v in self.index
+        iu, iv = self._add_node(u), self._add_node(v)
+        if iv in self._succ[iu]:
+            return
+        self._succ[iu].add(iv)
+        if not known or self._dirty:
+            self._dirty = True
+            return
+        cu, cv = self.comp[iu], self.comp[iv]
+        if cu == cv:
+            return
+        self.comp_succ[cu][cv] = self.comp_succ[cu].get(cv, 0) + 1
+        if self._comp_reaches(cu, cv):
+            return
+        if cv < cu or self.comp_block[cu] != self.comp_block[cv]:
+            # closes a cycle, breaks the topological numbering or joins two id blocks
+            self._dirty = True
+            return
+        add = self.reach[cv]
+        for a in range(cu, -1, -1):
+            if self._comp_reaches(a, cu):
+                self.reach[a] |= add << (cv - a)
+
+    def remove_edge(self, u, v) -> None:
+        iu, iv = self.index[u], self.index[v]
+        if iv not in self._succ[iu]:
+            return
+        self._succ[iu].discard(iv)
+        if self._dirty:
+            return
+        cu, cv = self.comp[iu], self.comp[iv]
+        if cu == cv:
+            self._dirty = True
+            return
+        cnt = self.comp_succ[cu][cv] - 1
+        if cnt:
+            self.comp_succ[cu][cv] = cnt
+            return
+        del self.comp_succ[cu][cv]
+        ancestors = [a for a in range(cu, -1, -1) if self._comp_reaches(a, cu)]
+        for a in ancestors:   # descending ids: successors are recomputed first
+            self.reach[a] = self._closure_of(a)
@@ -0,0 +1,116 @@
+
+from typing import Any, Dict, List, Optional, Sequence
+from math import factorial
+import itertools
+import numpy as np
+
+from profiling import profiled
+from risk_scoring import compute_node_risk_array, factor_matrix, weight_vector
+
+FACTOR_NAMES = ['criticality', 'cvss', 'exposure', 'patch_gap']
+UPSTREAM_NAME = 'upstream_risk'
+
+
+def _shapley(value_fn, n_players: int) -> np.ndarray:
+    """Exact Shapley values by enumerating all coalitions; value_fn(mask) -> (n,) array."""
+    cache = {}
+    for size in range(n_players + 1):
+        for S in itertools.combinations(range(n_players), size):
+            mask = np.zeros(n_players, dtype=bool)
+            mask[list(S)] = True
+            cache[S] = value_fn(mask)
+    n = len(cache[()])
+    phi = np.zeros((n, n_players))
+    for k in range(n_players):
+        others = [j for j in range(n_players) if j != k]
+        for size in range(n_players):
+            w = factorial(size) * factorial(n_players - size - 1) / factorial(n_players)
+            for S in itertools.combinations(others, size):
+                with_k = tuple(sorted(S + (k,)))
+                phi[:, k] += w * (cache[with_k] - cache[S])
+    return phi
+
+
+@profiled(rows=lambda r: len(r['X']))
+def exact_risk_attributions(F: np.ndarray, weights: Optional[Dict[str, float]] = None,
+                            baseline: Optional[Sequence[float]] = None,
+                            upstream: Optional[np.ndarray] = None,
+                            upstream_baseline: Optional[float] = None) -> Dict[str, Any]:
+    """Exact Shapley attributions of the clamped linear node-risk model.
+
+    F is factor_matrix() output. Absent factors take their baseline value (default:
+    fleet mean), so each row's attributions sum to model_output - base_value even
+    where the [0, 1] clamp binds. When upstream (mean predecessor node risk) is given,
+    the explained output is the propagated score min(1, node_risk + 0.5 * upstream)
+    and upstream is a fifth player. Values explain the unrounded model: model_output is
+    not rounded to 4 decimals like compute_node_risk_array / propagate_risk_array, so it
+    can differ from those scores by up to 1e-4 (rounding is left out to keep the
+    attributions summing exactly to model_output - base_value).
+    """
+    F = np.asarray(F, dtype=float)
+    w = weight_vector(weights)
+    b = F.mean(axis=0) if baseline is None else np.asarray(baseline, dtype=float)
+    contrib = (F - b) * w
+    base_lin = float(b @ w)
+    n_players = F.shape[1]
+    names: List[str] = list(FACTOR_NAMES)
+
+    if upstream is None:
+        def value(mask):
+            return np.clip(base_lin + contrib[:, mask].sum(axis=1), 0.0, 1.0)
+    else:
+        u = np.asarray(upstream, dtype=float)
+        u_b = float(u.mean()) if upstream_baseline is None else float(upstream_baseline)
+        n_players += 1
+        names.append(UPSTREAM_NAME)
+
+        def value(mask):
+            own = np.clip(base_lin + contrib[:, mask[:-1]].sum(axis=1), 0.0, 1.0)
+            return np.minimum(1.0, own + 0.5 * (u if mask[-1] else u_b))
+
+    phi = _shapley(value, n_players)
+    none = np.zeros(n_players, dtype=bool)
+    return {
+        'method': 'exact_shapley',
+        'explainer': None,
+        'shap_values': phi,
+        'permutation_importance': None,
+        'feature_names': names,
+        'base_value': float(value(none)[0]) if len(F) else 0.0,
+        'model_output': value(~none),
+        'X': np.column_stack([F, u]) if upstream is not None else F
+    }
+
+
+def explain_risk_scores(features, dependencies=None, weights: Optional[Dict[str, float]] = None,
+                        propagated: bool = False, baseline: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+    """exact_risk_attributions for an extract_features_from_csvs frame.
+
+    With propagated=True the one-hop propagated score is explained, using the
+    load_dependencies frame for predecessors (their rounded node risk, as
+    propagate_risk_array uses). model_output is the unrounded score, see
+    exact_risk_attributions. 'X' is returned as a DataFrame indexed by component_id,
+    so the result plugs into shap_global / shap_local directly.
+    """
+    import pandas as pd
+    from graph_utils import edge_index_arrays, mean_predecessor_risk
+
+    crit = features['criticality'].to_numpy(dtype=float)
+    cvss = features['base_cvss_sum'].to_numpy(dtype=float)
+    exposure = features['exposure_level'].tolist()
+    patched = features['is_patched'].to_numpy(dtype=bool)
+    F = factor_matrix(crit, cvss, exposure, patched)
+    ids = features['component_id'].astype(str).tolist()
+
+    upstream = None
+    if propagated:
+        if dependencies is None:
+            raise ValueError('dependencies are required to explain propagated risk')
+        src, dst = edge_index_arrays(ids, dependencies)
+        # propagation uses the (rounded) node risk of predecessors, exactly as propagate_risk_array
+        r = compute_node_risk_array(crit, cvss, exposure, patched, weights)
+        upstream = mean_predecessor_risk(r, src, dst)
+
+    out = exact_risk_attributions(F, weights, baseline=baseline, upstream=upstream)
+    out['X'] = pd.DataFrame(out['X'], columns=out['feature_names'], index=pd.Index(ids, name='component_id'))
+    return out
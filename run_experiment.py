@@ -8,6 +8,8 @@ import subprocess
 from pathlib import Path
 from datetime import datetime
 
+from profiling import PROFILE_ENV_VAR, chrome_trace_path
+
 def set_global_seed(seed: int):
     os.environ['PYTHONHASHSEED'] = str(seed)
     random.seed(seed)
@@ -33,13 +35,22 @@ def load_config(path: Path) -> dict:
 def ensure_dir(p: Path):
     p.mkdir(parents=True, exist_ok=True)
 
-def call_trainer(trainer_script: Path, features: Path, config: Path, out_dir: Path, seed: int, save_stdout: bool):
+def call_trainer(trainer_script: Path, features: Path, config: Path, out_dir: Path, seed: int, save_stdout: bool,
+                 profile: bool = False):
     """Call trainer script as subprocess and capture stdout/stderr."""
     cmd = [sys.executable, str(trainer_script), '--features', str(features), '--config', str(config)]
     env = os.environ.copy()
     env['EXPERIMENT_SEED'] = str(seed)
+    profile_path = out_dir / 'profile_trace.json'
+    if profile:
+        # trainer processes importing the pipeline modules pick this up and dump a stage trace on exit
+        env[PROFILE_ENV_VAR] = str(profile_path)
     # create output dir for this run
     ensure_dir(out_dir)
+    # a trace left by an earlier run in this directory must not be attached to this one
+    for stale in (profile_path, chrome_trace_path(profile_path)):
+        if stale.exists():
+            stale.unlink()
     stdout_path = out_dir / 'stdout.txt'
     stderr_path = out_dir / 'stderr.txt'
     meta = {'cmd': cmd, 'env_seed': seed, 'started_at': datetime.utcnow().isoformat() + 'Z'}
@@ -51,6 +62,12 @@ def call_trainer(trainer_script: Path, features: Path, config: Path, out_dir: Pa
         err_f.write(err or b'')
     meta['returncode'] = proc.returncode
     meta['finished_at'] = datetime.utcnow().isoformat() + 'Z'
+    if profile and profile_path.exists():
+        try:
+            meta['profile'] = json.loads(profile_path.read_text(encoding='utf-8'))
+            meta['profile_chrome_trace'] = str(chrome_trace_path(profile_path))
+        except Exception as e:
+            meta['profile'] = {'error': f'unreadable profile trace: {e}'}
     (out_dir / 'run_meta.json').write_text(json.dumps(meta, indent=2), encoding='utf-8')
     return proc.returncode
 
@@ -60,6 +77,7 @@ def main():
     parser.add_argument('--repeat', '-r', type=int, default=None, help='Number of repeats (overrides config.training.n_repeats)')
     parser.add_argument('--seed-file', '-s', default=None, help='Optional file with seeds (one per line). If provided, repeat is ignored.')
     parser.add_argument('--dry-run', action='store_true', help='Print planned commands but do not execute trainers')
+    parser.add_argument('--profile', action='store_true', help='Record per-stage timings/memory in run_meta.json (overrides config.logging.profile)')
     args = parser.parse_args()
 
     cfg_path = Path(args.config)
@@ -78,6 +96,7 @@ def main():
 
     save_stdout = bool(logging_cfg.get('save_stdout', True))
     save_meta = bool(logging_cfg.get('save_run_metadata', True))
+    profile = args.profile or bool(logging_cfg.get('profile', False))
 
     # Determine seeds
     if args.seed_file:
@@ -121,7 +140,7 @@ def main():
         if not features_csv.exists():
             print('Features CSV not found (expected):', features_csv, file=sys.stderr)
             # still attempt to run trainer; trainer should error if features missing
-        rc = call_trainer(trainer_script, features_csv, model_config, run_dir, seed, save_stdout)
+        rc = call_trainer(trainer_script, features_csv, model_config, run_dir, seed, save_stdout, profile=profile)
         print('Return code:', rc)
     print('All runs finished.')
 
@@ -0,0 +1,151 @@
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import scipy.sparse as sp
+
+from graph_utils import edge_index_arrays, unique_edges
+from profiling import profiled
+from risk_scoring import estimate_risk_reduction_array
+
+
+def _is_plan_list(scenarios) -> bool:
+    if not isinstance(scenarios, (list, tuple)):
+        return False
+    for plan in scenarios:
+        if isinstance(plan, (set, frozenset)):
+            return True
+        for item in plan:
+            return isinstance(item, str)
+    return True
+
+
+class ScenarioEngine:
+    """Evaluates many patch plans (scenarios x components boolean matrix) at once.
+
+    Patching a component applies the same model as estimate_risk_reduction_if_patched
+    (patch flag set, CVSS sum scaled by patch_effectiveness). Propagated risk follows
+    propagate_risk_simple: min(1, r_i + 0.5 * mean predecessor risk). A scenario only
+    changes the patched nodes and their direct successors, so every quantity is a
+    sparse update of the baseline. Propagated values are left unrounded.
+    """
+
+    def __init__(self, ids: Sequence[str], criticality, base_cvss_sum, exposure_levels, is_patched,
+                 src, dst, layers: Optional[Sequence[str]] = None,
+                 weights: Optional[Dict[str, float]] = None, patch_effectiveness: float = 0.6):
+        self.ids = [str(c) for c in ids]
+        self.index = {cid: i for i, cid in enumerate(self.ids)}
+        n = len(self.ids)
+
+        est = estimate_risk_reduction_array(criticality, base_cvss_sum, exposure_levels, is_patched,
+                                            weights, patch_effectiveness)
+        self.node_risk = est['current_risk']
+        self.patch_delta = self.node_risk - est['post_patch_risk']
+
+        src, dst = unique_edges(src, dst)
+        indeg = np.bincount(dst, minlength=n).astype(float)
+        # A[p, i] = 1 / indeg(i) for p -> i, so (r @ A)[i] is the mean predecessor risk of i
+        self.mean_pred_op = sp.csr_matrix((1.0 / indeg[dst], (src, dst)), shape=(n, n))
+        mean_pred = self.node_risk @ self.mean_pred_op
+        self.raw_propagated = self.node_risk + 0.5 * mean_pred
+        self.propagated = np.minimum(1.0, self.raw_propagated)
+
+        layer_values = [str(x) for x in layers] if layers is not None else [''] * n
+        self.layers, layer_codes = np.unique(np.array(layer_values, dtype=object), return_inverse=True)
+        self.layers = [str(x) for x in self.layers]
+        self.layer_op = sp.csr_matrix((np.ones(n), (np.arange(n), layer_codes)), shape=(n, len(self.layers)))
+        self.baseline = {
+            'node_risk_total': float(self.node_risk.sum()),
+            'propagated_risk_total': float(self.propagated.sum()),
+            'node_risk_by_layer': np.asarray(self.node_risk @ self.layer_op).ravel(),
+            'propagated_risk_by_layer': np.asarray(self.propagated @ self.layer_op).ravel()
+        }
+
+    @classmethod
+    def from_features(cls, features, dependencies, **kwargs) -> 'ScenarioEngine':
+        """Build from extract_features_from_csvs / load_dependencies frames."""
+        ids = features['component_id'].astype(str).tolist()
+        src, dst = edge_index_arrays(ids, dependencies)
+        return cls(ids, features['criticality'].to_numpy(dtype=float),
+                   features['base_cvss_sum'].to_numpy(dtype=float),
+                   features['exposure_level'].tolist(), features['is_patched'].to_numpy(dtype=bool),
+                   src, dst, layers=features['layer'].tolist(), **kwargs)
+
+    def scenario_matrix(self, plans: Sequence[Iterable[str]]) -> sp.csr_matrix:
+        """Boolean CSR matrix from patch plans given as collections of component ids."""
+        rows, cols = [], []
+        for s, plan in enumerate(plans):
+            for cid in plan:
+                j = self.index.get(str(cid))
+                if j is None:
+                    raise KeyError(f'Unknown component in scenario {s}: {cid!r}')
+                rows.append(s)
+                cols.append(j)
+        data = np.ones(len(rows), dtype=bool)
+        S = sp.csr_matrix((data, (rows, cols)), shape=(len(plans), len(self.ids)))
+        S.sum_duplicates()
+        return S
+
+    def _evaluate_chunk(self, S: sp.csr_matrix) -> Dict[str, np.ndarray]:
+        S = S.astype(bool).astype(float)
+        # node-level reductions (patched nodes only), then their effect on successors' mean term
+        d_node = S @ sp.diags(self.patch_delta)
+        d_mean = d_node @ self.mean_pred_op
+        d_raw = (d_node + 0.5 * d_mean).tocsr()
+        cols = d_raw.indices
+        red = sp.csr_matrix((self.propagated[cols] - np.minimum(1.0, self.raw_propagated[cols] - d_raw.data),
+                             cols, d_raw.indptr), shape=d_raw.shape)
+        node_red = np.asarray(d_node.sum(axis=1)).ravel()
+        prop_red = np.asarray(red.sum(axis=1)).ravel()
+        return {
+            'node_risk_reduction': node_red,
+            'propagated_risk_reduction': prop_red,
+            'node_risk_reduction_by_layer': np.asarray((d_node @ self.layer_op).todense()),
+            'propagated_risk_reduction_by_layer': np.asarray((red @ self.layer_op).todense()),
+            'patched_count': np.asarray(S.sum(axis=1)).ravel().astype(np.int64)
+        }
+
+    @profiled(rows=lambda r: len(r['patched_count']))
+    def evaluate(self, scenarios, chunk_size: int = 4096) -> Dict[str, Any]:
+        """Evaluate every scenario row; scenarios is a boolean array/sparse matrix or a list of id plans."""
+        if _is_plan_list(scenarios):
+            S = self.scenario_matrix(scenarios)
+        else:
+            S = sp.csr_matrix(scenarios)
+        if S.shape[1] != len(self.ids):
+            raise ValueError(f'Scenario matrix has {S.shape[1]} columns, expected {len(self.ids)} components')
+        parts: List[Dict[str, np.ndarray]] = []
+        for start in range(0, S.shape[0], chunk_size):
+            parts.append(self._evaluate_chunk(S[start:start + chunk_size]))
+        keys = ('node_risk_reduction', 'propagated_risk_reduction', 'node_risk_reduction_by_layer',
+                'propagated_risk_reduction_by_layer', 'patched_count')
+        if parts:
+            out = {k: np.concatenate([p[k] for p in parts]) for k in keys}
+        else:
+            out = {k: np.zeros((0, len(self.layers)) if k.endswith('by_layer') else 0) for k in keys}
+        out['post_node_risk_total'] = self.baseline['node_risk_total'] - out['node_risk_reduction']
+        out['post_propagated_risk_total'] = self.baseline['propagated_risk_total'] - out['propagated_risk_reduction']
+        out['layers'] = list(self.layers)
+        return out
+
+    def scenario_node_risk(self, plan: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Full post-patch node and propagated risk vectors for a single plan."""
+        patched = np.zeros(len(self.ids), dtype=bool)
+        for cid in plan:
+            patched[self.index[str(cid)]] = True
+        r = self.node_risk - np.where(patched, self.patch_delta, 0.0)
+        return {'node_risk': r, 'propagated_risk': np.minimum(1.0, r + 0.5 * (r @ self.mean_pred_op))}
+
+    def summary_frame(self, result: Dict[str, Any]):
+        """Tabulate evaluate() output: one row per scenario, per-layer columns suffixed by layer name."""
+        import pandas as pd
+        df = pd.DataFrame({
+            'patched_count': result['patched_count'],
+            'node_risk_reduction': result['node_risk_reduction'],
+            'propagated_risk_reduction': result['propagated_risk_reduction'],
+            'post_node_risk_total': result['post_node_risk_total'],
+            'post_propagated_risk_total': result['post_propagated_risk_total']
+        })
+        for j, layer in enumerate(result['layers']):
+            df[f'node_risk_reduction[{layer}]'] = result['node_risk_reduction_by_layer'][:, j]
+            df[f'propagated_risk_reduction[{layer}]'] = result['propagated_risk_reduction_by_layer'][:, j]
+        return df
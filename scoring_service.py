@@ -0,0 +1,409 @@
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from pathlib import Path
+import argparse
+import asyncio
+import http.client
+import json
+import signal
+import socket
+import sys
+
+import numpy as np
+
+from decision_rules import TRIAGE_LEVELS as _TRIAGE_LEVELS, triage_array
+from graph_utils import edge_index_arrays, propagate_risk_array
+from risk_scoring import estimate_risk_reduction_array
+
+EPS = 1e-6
+QUERY_OPS = ('risk', 'propagated', 'triage', 'top_k')
+SOURCE_KEYS = ('components_csv', 'dependencies_csv', 'vulnerabilities_csv')
+TRIAGE_LEVELS = np.array(_TRIAGE_LEVELS)
+
+
+class TwinState:
+    """Immutable in-memory snapshot of the twin: registry, graph arrays and precomputed scores."""
+
+    def __init__(self, features, dependencies, cost_map: Optional[Dict[str, float]] = None,
+                 weights: Optional[Dict[str, float]] = None, patch_effectiveness: float = 0.6,
+                 sources: Optional[Dict[str, str]] = None):
+        from component_registration import Component, ComponentRegistry
+
+        self.sources = dict(sources or {})
+        self.ids = features['component_id'].astype(str).tolist()
+        self.index = {cid: i for i, cid in enumerate(self.ids)}
+        n = len(self.ids)
+
+        self.registry = ComponentRegistry()
+        for rec in features[['component_id', 'role', 'os_type', 'layer', 'criticality',
+                             'exposure_level', 'is_patched']].itertuples(index=False):
+            self.registry.register(Component(rec.component_id, rec.role, rec.os_type, rec.layer,
+                                             int(rec.criticality), rec.exposure_level, bool(rec.is_patched)))
+
+        self.src, self.dst = edge_index_arrays(self.ids, dependencies)
+
+        crit = features['criticality'].to_numpy(dtype=float)
+        cvss = features['base_cvss_sum'].to_numpy(dtype=float)
+        exposure = features['exposure_level'].tolist()
+        patched = features['is_patched'].to_numpy(dtype=bool)
+        self.vuln_count = features['vuln_count'].to_numpy(dtype=np.int64)
+
+        est = estimate_risk_reduction_array(crit, cvss, exposure, patched, weights, patch_effectiveness)
+        self.node_risk = est['current_risk']
+        self.propagated = propagate_risk_array(self.node_risk, self.src, self.dst)
+        self.triage = triage_array(self.node_risk, self.vuln_count)
+
+        cost_map = cost_map or {}
+        self.cost = np.array([float(cost_map.get(cid, 0.0)) for cid in self.ids], dtype=float)
+        self.post_patch_risk = est['post_patch_risk']
+        self.absolute_reduction = est['absolute_reduction']
+        self.roi = self.absolute_reduction / (self.cost + EPS)
+        # same ordering as patch_ranking.rank_by_roi (stable on input order)
+        self.ranking = np.lexsort((-self.node_risk, -self.absolute_reduction, -self.roi)) if n else np.zeros(0, int)
+
+    @classmethod
+    def from_csvs(cls, components_csv: str, dependencies_csv: str, vulnerabilities_csv: str,
+                  cost_map: Optional[Dict[str, float]] = None, **kwargs) -> 'TwinState':
+        from feature_extraction import extract_features_from_csvs, load_dependencies
+        features = extract_features_from_csvs(components_csv, dependencies_csv, vulnerabilities_csv)
+        deps = load_dependencies(dependencies_csv)
+        sources = {'components_csv': str(components_csv), 'dependencies_csv': str(dependencies_csv),
+                   'vulnerabilities_csv': str(vulnerabilities_csv)}
+        return cls(features, deps, cost_map=cost_map, sources=sources, **kwargs)
+
+    def lookup(self, ids: Sequence[str]) -> np.ndarray:
+        return np.array([self.index.get(str(c), -1) for c in ids], dtype=np.int64)
+
+    def ranking_rows(self, k: int) -> List[Dict[str, Any]]:
+        rows = []
+        for i in self.ranking[:k]:
+            rows.append({
+                'component_id': self.ids[i],
+                'current_risk': float(self.node_risk[i]),
+                'post_patch_risk': float(self.post_patch_risk[i]),
+                'absolute_reduction': float(self.absolute_reduction[i]),
+                'cost': float(self.cost[i]),
+                'roi': float(self.roi[i]),
+                'vuln_count': int(self.vuln_count[i])
+            })
+        return rows
+
+
+def validate_query(payload: Any) -> Optional[str]:
+    """Error message for a malformed /query payload, None if it can join a batch."""
+    if not isinstance(payload, dict):
+        return 'query body must be a JSON object'
+    op = payload.get('op')
+    if op not in QUERY_OPS:
+        return f'unknown op {op!r}; expected one of {list(QUERY_OPS)}'
+    if op == 'top_k':
+        k = payload.get('k', 10)
+        if not isinstance(k, int) or isinstance(k, bool):
+            return f"'k' must be an integer, got {k!r}"
+    else:
+        ids = payload.get('ids', [])
+        if not isinstance(ids, list) or not all(isinstance(c, str) for c in ids):
+            return "'ids' must be a list of component id strings"
+    return None
+
+
+def resolve_sources(current: Dict[str, str], paths: Any) -> Dict[str, str]:
+    """CSV paths for a reload: current sources overridden by paths; ValueError if unusable."""
+    if not isinstance(paths, dict):
+        raise ValueError('reload body must be a JSON object')
+    sources = dict(current)
+    for k in SOURCE_KEYS:
+        v = paths.get(k)
+        if v is None or v == '':
+            continue
+        if not isinstance(v, str):
+            raise ValueError(f'{k!r} must be a path string, got {v!r}')
+        sources[k] = v
+    missing = [k for k in SOURCE_KEYS if not sources.get(k)]
+    if missing:
+        raise ValueError('No path known for ' + ', '.join(missing))
+    not_found = [sources[k] for k in SOURCE_KEYS if not Path(sources[k]).is_file()]
+    if not_found:
+        raise ValueError('No such file: ' + ', '.join(not_found))
+    return sources
+
+
+def evaluate_batch(state: TwinState, queries: List[Dict[str, Any]]) -> List[Any]:
+    """Answer a batch of queries with one gather per op (and one ranking slice for top_k)."""
+    results: List[Any] = [None] * len(queries)
+    by_op: Dict[str, List[int]] = {}
+    for qi, q in enumerate(queries):
+        by_op.setdefault(q.get('op'), []).append(qi)
+
+    for op, qis in by_op.items():
+        if op in ('risk', 'propagated', 'triage'):
+            id_lists = [[str(c) for c in queries[qi].get('ids', [])] for qi in qis]
+            idx = state.lookup([c for ids in id_lists for c in ids])
+            safe = np.where(idx >= 0, idx, 0)
+            if op == 'risk':
+                vals = state.node_risk[safe].tolist()
+            elif op == 'propagated':
+                vals = state.propagated[safe].tolist()
+            else:
+                vals = TRIAGE_LEVELS[state.triage[safe]].tolist()
+            missing = (idx < 0).tolist()
+            pos = 0
+            for qi, ids in zip(qis, id_lists):
+                results[qi] = {cid: (None if missing[pos + j] else vals[pos + j]) for j, cid in enumerate(ids)}
+                pos += len(ids)
+        elif op == 'top_k':
+            ks = [max(0, int(queries[qi].get('k', 10))) for qi in qis]
+            rows = state.ranking_rows(max(ks))
+            for qi, k in zip(qis, ks):
+                results[qi] = rows[:k]
+        else:
+            for qi in qis:
+                results[qi] = {'error': f'unknown op {op!r}; expected one of {list(QUERY_OPS)}'}
+    return results
+
+
+class MicroBatcher:
+    """Collects concurrent submissions for up to max_delay seconds (or max_batch items) and
+    hands them to a synchronous batch handler in one call."""
+
+    def __init__(self, handler: Callable[[List[Any]], List[Any]], max_batch: int = 512, max_delay: float = 0.002):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((item, fut))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        try:
+            results = self.handler([item for item, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), res in zip(batch, results):
+            if not fut.done():
+                fut.set_result(res)
+
+
+class ScoringService:
+    """asyncio HTTP/1.1 JSON service over TCP or a Unix socket.
+
+    Endpoints: GET /health, POST /query {"op", "ids" | "k"}, POST /reload {optional csv paths}.
+    """
+
+    def __init__(self, state: TwinState, cost_map: Optional[Dict[str, float]] = None,
+                 max_batch: int = 512, max_delay: float = 0.002, **state_kwargs):
+        self.state = state
+        self.cost_map = cost_map
+        self.state_kwargs = state_kwargs
+        self.batcher = MicroBatcher(lambda qs: evaluate_batch(self.state, qs), max_batch, max_delay)
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.generation = 0
+        self._reload_lock: Optional[asyncio.Lock] = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0, unix_path: Optional[str] = None):
+        self._reload_lock = asyncio.Lock()
+        if unix_path:
+            self.server = await asyncio.start_unix_server(self._handle, path=unix_path)
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server
+
+    @property
+    def port(self) -> Optional[int]:
+        if self.server is None:
+            return None
+        sock = self.server.sockets[0]
+        return sock.getsockname()[1] if sock.family in (socket.AF_INET, socket.AF_INET6) else None
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def reload(self, **paths) -> Dict[str, Any]:
+        """Rebuild the twin off the event loop and swap it in; queries keep hitting the old state meanwhile."""
+        async with self._reload_lock:
+            sources = resolve_sources(self.state.sources, paths)
+            loop = asyncio.get_running_loop()
+            new_state = await loop.run_in_executor(
+                None, lambda: TwinState.from_csvs(sources['components_csv'], sources['dependencies_csv'],
+                                                  sources['vulnerabilities_csv'], cost_map=self.cost_map,
+                                                  **self.state_kwargs))
+            self.state = new_state
+            self.generation += 1
+            return {'reloaded': True, 'generation': self.generation, 'components': len(new_state.ids)}
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok', 'generation': self.generation, 'components': len(self.state.ids),
+                         'edges': int(len(self.state.src))}
+        if method != 'POST' or path not in ('/query', '/reload'):
+            return 404, {'error': f'no route for {method} {path}'}
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            return 400, {'error': 'invalid JSON body'}
+        if path == '/reload':
+            try:
+                sources = resolve_sources(self.state.sources, payload)
+            except ValueError as e:
+                return 400, {'error': str(e)}
+            try:
+                return 200, await self.reload(**sources)
+            except Exception as e:
+                return 500, {'error': f'reload failed: {e}'}
+        error = validate_query(payload)
+        if error:
+            return 400, {'error': error}
+        return 200, {'op': payload['op'], 'result': await self.batcher.submit(payload)}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').split()
+                if len(parts) < 2:
+                    break
+                method, path = parts[0].upper(), parts[1].split('?', 1)[0]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    k, _, v = line.decode('latin-1').partition(':')
+                    headers[k.strip().lower()] = v.strip()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # the body cannot be framed, so the connection cannot be reused
+                    status, payload = 400, {'error': 'invalid Content-Length header'}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length)
+                    try:
+                        status, payload = await self._dispatch(method, path, body)
+                    except Exception as e:
+                        status, payload = 500, {'error': f'internal error: {type(e).__name__}: {e}'}
+                data = json.dumps(payload).encode('utf-8')
+                writer.write(f'HTTP/1.1 {status} {http.client.responses.get(status, "")}\r\n'
+                             f'Content-Type: application/json\r\nContent-Length: {len(data)}\r\n'
+                             f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+class ScoringClient:
+    """Minimal blocking client for SOC scripts (stdlib only, no pandas/sklearn import)."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, timeout: float = 30.0):
+        self.conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _call(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        self.conn.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+        resp = self.conn.getresponse()
+        data = json.loads(resp.read() or b'null')
+        if resp.status != 200:
+            raise RuntimeError(f'{method} {path} failed ({resp.status}): {data}')
+        return data
+
+    def query(self, op: str, ids: Optional[Sequence[str]] = None, k: Optional[int] = None) -> Any:
+        payload: Dict[str, Any] = {'op': op}
+        if ids is not None:
+            payload['ids'] = list(ids)
+        if k is not None:
+            payload['k'] = int(k)
+        return self._call('POST', '/query', payload)['result']
+
+    def reload(self, **paths) -> Dict[str, Any]:
+        return self._call('POST', '/reload', paths)
+
+    def health(self) -> Dict[str, Any]:
+        return self._call('GET', '/health')
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _reload_on_signal(service: ScoringService) -> None:
+    task = asyncio.ensure_future(service.reload())
+
+    def report(t: asyncio.Future) -> None:
+        if t.cancelled():
+            return
+        e = t.exception()
+        if e is not None:
+            print(f'SIGHUP reload failed: {type(e).__name__}: {e}', file=sys.stderr, flush=True)
+        else:
+            res = t.result()
+            print(f"Reloaded twin (generation {res['generation']}, {res['components']} components)", flush=True)
+
+    task.add_done_callback(report)
+
+
+async def _serve(args) -> None:
+    cost_map = json.loads(Path(args.costs).read_text(encoding='utf-8')) if args.costs else None
+    state = TwinState.from_csvs(args.components, args.dependencies, args.vulnerabilities, cost_map=cost_map)
+    service = ScoringService(state, cost_map=cost_map, max_batch=args.max_batch, max_delay=args.max_delay_ms / 1e3)
+    server = await service.start(args.host, args.port, unix_path=args.unix_socket)
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGHUP, _reload_on_signal, service)
+    except (NotImplementedError, AttributeError):
+        pass
+    where = args.unix_socket or f'{args.host}:{service.port}'
+    print(f'Scoring service listening on {where} ({len(state.ids)} components)', flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Long-lived local risk scoring service')
+    parser.add_argument('--components', required=True)
+    parser.add_argument('--dependencies', required=True)
+    parser.add_argument('--vulnerabilities', required=True)
+    parser.add_argument('--costs', default=None, help='Optional JSON file mapping component_id -> patch cost')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix-socket', default=None, help='Serve on a Unix socket instead of TCP')
+    parser.add_argument('--max-batch', type=int, default=512)
+    parser.add_argument('--max-delay-ms', type=float, default=2.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
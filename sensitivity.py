@@ -0,0 +1,192 @@
+
+from typing import Any, Dict, List, Optional, Sequence
+import itertools
+import numpy as np
+
+from profiling import profiled
+from risk_scoring import DEFAULT_WEIGHTS, factor_matrix, weight_vector
+
+WEIGHT_KEYS = ['w_c', 'w_v', 'w_e', 'w_p']
+
+
+def weight_grid(step: float = 0.05, total: float = 1.0) -> np.ndarray:
+    """Every (w_c, w_v, w_e, w_p) on a regular simplex grid summing to total."""
+    k = int(round(total / step))
+    rows = [(a, b, c, k - a - b - c)
+            for a, b, c in itertools.product(range(k + 1), repeat=3) if a + b + c <= k]
+    return np.array(rows, dtype=float) * step
+
+
+def sample_weights(n_samples: int, seed: int = 42, center: Optional[Dict[str, float]] = None,
+                   concentration: Optional[float] = 50.0) -> np.ndarray:
+    """Dirichlet sample of weight vectors around center (DEFAULT_WEIGHTS); uniform on the simplex
+    when concentration is None."""
+    rng = np.random.default_rng(seed)
+    if concentration is None:
+        alpha = np.ones(len(WEIGHT_KEYS))
+    else:
+        alpha = weight_vector(center or DEFAULT_WEIGHTS) * float(concentration)
+    return rng.dirichlet(alpha, size=n_samples)
+
+
+def _score_keys(F: np.ndarray, Wc: np.ndarray) -> np.ndarray:
+    """int16 keys rint(round_array(clip(Wc @ F.T)) * 1e4) for a chunk of configs.
+
+    Same values as rounding with round_array first, but computed in place: only the
+    near-ties (where round_array falls back to round()) are re-rounded in Python.
+    """
+    raw = Wc @ F.T
+    np.clip(raw, 0.0, 1.0, out=raw)
+    scaled = raw * 1e4
+    keys = np.rint(scaled)
+    np.subtract(scaled, keys, out=scaled)
+    near = np.flatnonzero(np.abs(scaled, out=scaled) > 0.5 - 1e-6)
+    if len(near):
+        flat_keys, flat_raw = keys.reshape(-1), raw.reshape(-1)
+        flat_keys[near] = [round(round(float(x), 4) * 1e4) for x in flat_raw[near]]
+    return keys.astype(np.int16)
+
+
+def _rankings(order_base: np.ndarray, score_keys: np.ndarray) -> np.ndarray:
+    """Ranking orders for a chunk of configs (rows of score_keys).
+
+    Equivalent to sorting by (-node_risk, -vuln_count, input order) as
+    rank_by_absolute_risk does: order_base already sorts by (-vuln_count, index), and a
+    stable radix sort on the integer risk key finishes the lexicographic order.
+    """
+    permuted = score_keys[:, order_base]
+    np.negative(permuted, out=permuted)
+    return order_base[np.argsort(permuted, axis=1, kind='stable')]
+
+
+def pairwise_kendall_tau(ranks: np.ndarray, max_buffer_bytes: int = 64 << 20) -> np.ndarray:
+    """Kendall tau between every pair of rows of a tie-free rank matrix (configs x items).
+
+    tau(a, b) = sum over item pairs of sign(a_i - a_j) * sign(b_i - b_j) / n_pairs, so
+    stacking the sign vectors of all configs into S (item pairs x configs) gives every
+    tau at once as S^T S / n_pairs. S is built and multiplied in float32 chunks of at
+    most max_buffer_bytes (exact below 2**24 pairs per chunk). Cost is about
+    configs^2 * items^2 / 2 flops, so keep items small (weight_sensitivity_arrays
+    uses pairwise_sample).
+    """
+    R = np.asarray(ranks)
+    m, s = R.shape
+    RT = np.ascontiguousarray(R.T)
+    rows = min(max(s, max_buffer_bytes // (4 * max(m, 1))), 1 << 24)
+    buf = np.empty((rows, m), dtype=np.float32)
+    acc = np.zeros((m, m))
+    fill = 0
+    for i in range(s - 1):
+        d = s - i - 1
+        if fill + d > len(buf):
+            acc += buf[:fill].T @ buf[:fill]
+            fill = 0
+        np.sign(RT[i + 1:] - RT[i], out=buf[fill:fill + d], casting='unsafe')
+        fill += d
+    if fill:
+        acc += buf[:fill].T @ buf[:fill]
+    return acc / max(s * (s - 1) // 2, 1)
+
+
+@profiled(rows=lambda r: len(r['baseline_rank']))
+def weight_sensitivity_arrays(F: np.ndarray, vuln_count: np.ndarray, weight_vectors: np.ndarray,
+                              top_k: int = 10, baseline_weights: Optional[Dict[str, float]] = None,
+                              tau_sample: Optional[int] = 2_000, pairwise: bool = False,
+                              pairwise_sample: int = 256, chunk_size: int = 16, seed: int = 42) -> Dict[str, Any]:
+    """Rank stability of the absolute-risk ranking under many weight vectors.
+
+    F is factor_matrix() output (n x 4). Scores for a chunk of weight vectors come
+    from one matrix multiply, rounded like compute_node_risk; rank scatter, min/max/sum
+    and top-k counts are updated once per chunk. Kendall tau against the baseline
+    ranking is computed on a fixed random sample of tau_sample components (all
+    components when None; standard error about 0.015 at 2000). With pairwise=True the
+    configs x configs tau matrix uses the first pairwise_sample of those components
+    (see pairwise_kendall_tau for the cost).
+    """
+    from scipy.stats import kendalltau
+
+    W = np.atleast_2d(np.asarray(weight_vectors, dtype=float))
+    n, m = F.shape[0], W.shape[0]
+    vuln_count = np.asarray(vuln_count, dtype=np.int64)
+    order_base = np.argsort(-vuln_count, kind='stable')
+
+    base_order = _rankings(order_base, _score_keys(F, weight_vector(baseline_weights)[None, :]))[0]
+    base_rank = np.empty(n, dtype=np.int64)
+    base_rank[base_order] = np.arange(n)
+
+    rng = np.random.default_rng(seed)
+    if tau_sample is not None and tau_sample < n:
+        sample = np.sort(rng.choice(n, tau_sample, replace=False))
+    else:
+        sample = np.arange(n)
+    pair_items = sample[np.sort(rng.permutation(len(sample))[:pairwise_sample])] if pairwise else None
+    base_sample = base_rank[sample]
+
+    rank_min = np.full(n, n, dtype=np.int64)
+    rank_max = np.zeros(n, dtype=np.int64)
+    rank_sum = np.zeros(n, dtype=np.int64)
+    topk_hits = np.zeros(n, dtype=np.int64)
+    tau = np.empty(m)
+    pair_ranks = np.empty((m, len(pair_items)), dtype=np.int64) if pairwise else None
+    positions = np.arange(n, dtype=np.int32)
+
+    for start in range(0, m, chunk_size):
+        orders = _rankings(order_base, _score_keys(F, W[start:start + chunk_size]))
+        c = len(orders)
+        # ranks[j, orders[j, p]] = p for every config of the chunk in one scatter
+        ranks = np.empty((c, n), dtype=np.int32)
+        ranks.reshape(-1)[(orders + (np.arange(c, dtype=np.int64) * n)[:, None]).reshape(-1)] = np.tile(positions, c)
+        np.minimum(rank_min, ranks.min(axis=0), out=rank_min)
+        np.maximum(rank_max, ranks.max(axis=0), out=rank_max)
+        rank_sum += ranks.sum(axis=0, dtype=np.int64)
+        topk_hits += np.bincount(orders[:, :top_k].reshape(-1), minlength=n)
+        if len(sample) > 1:
+            sampled = ranks[:, sample]
+            tau[start:start + c] = [kendalltau(base_sample, row)[0] for row in sampled]
+        else:
+            tau[start:start + c] = 1.0
+        if pairwise:
+            pair_ranks[start:start + c] = ranks[:, pair_items]
+
+    out = {
+        'weights': W,
+        'baseline_rank': base_rank,
+        'rank_min': rank_min,
+        'rank_max': rank_max,
+        'rank_mean': rank_sum / max(m, 1),
+        'topk_frequency': topk_hits / max(m, 1),
+        'kendall_tau': tau,
+        'tau_sample_size': int(len(sample)),
+        'top_k': top_k
+    }
+    if pairwise:
+        out['pairwise_tau'] = pairwise_kendall_tau(pair_ranks) if len(pair_items) > 1 else np.ones((m, m))
+        out['pairwise_sample_size'] = int(len(pair_items))
+    return out
+
+
+def weight_sensitivity(features, weight_vectors, **kwargs) -> Dict[str, Any]:
+    """weight_sensitivity_arrays over an extract_features_from_csvs frame; adds component_ids."""
+    F = factor_matrix(features['criticality'].to_numpy(dtype=float),
+                      features['base_cvss_sum'].to_numpy(dtype=float),
+                      features['exposure_level'].tolist(),
+                      features['is_patched'].to_numpy(dtype=bool))
+    out = weight_sensitivity_arrays(F, features['vuln_count'].to_numpy(), weight_vectors, **kwargs)
+    out['component_ids'] = features['component_id'].astype(str).tolist()
+    return out
+
+
+def sensitivity_frame(result: Dict[str, Any], component_ids: Optional[Sequence[str]] = None):
+    """Per-component table (1-based ranks) ordered by the baseline ranking."""
+    import pandas as pd
+    ids = component_ids if component_ids is not None else result.get('component_ids')
+    df = pd.DataFrame({
+        'component_id': list(ids) if ids is not None else np.arange(len(result['baseline_rank'])),
+        'baseline_rank': result['baseline_rank'] + 1,
+        'rank_min': result['rank_min'] + 1,
+        'rank_max': result['rank_max'] + 1,
+        'rank_mean': result['rank_mean'] + 1,
+        'rank_range': result['rank_max'] - result['rank_min'],
+        f'top{result["top_k"]}_frequency': result['topk_frequency']
+    })
+    return df.sort_values('baseline_rank').reset_index(drop=True)
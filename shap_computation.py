@@ -1,25 +1,29 @@
 
-from typing import Any, Dict, Optional, Sequence
+from typing import Any, Dict, Optional, Sequence, TYPE_CHECKING
+import importlib.util
 import numpy as np
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd
 
-try:
-    import shap  # type: ignore
-    HAS_SHAP = True
-except Exception:
-    HAS_SHAP = False
+# shap and sklearn are slow to import; only probe availability here and import on first use
+HAS_SHAP = importlib.util.find_spec('shap') is not None
 
-from sklearn.inspection import permutation_importance
+from profiling import profiled
 
-def compute_shap_or_permutation(model: Any, X: pd.DataFrame, feature_names: Optional[Sequence[str]] = None,
+@profiled(rows=lambda r: None if r['shap_values'] is None else len(r['shap_values']))
+def compute_shap_or_permutation(model: Any, X: 'pd.DataFrame', feature_names: Optional[Sequence[str]] = None,
                                 random_state: int = 42, nsamples: int = 100) -> Dict:
 
+    import pandas as pd
+    from sklearn.inspection import permutation_importance
+
     if feature_names is None:
         feature_names = list(X.columns)
 
     # Try SHAP
     if HAS_SHAP:
         try:
+            import shap  # type: ignore
             # prefer tree explainer for tree models for speed/accuracy
             try:
                 explainer = shap.Explainer(model, X, feature_names=feature_names)
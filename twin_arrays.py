@@ -0,0 +1,90 @@
+
+from typing import Any, Dict, List, Optional
+import csv
+import math
+import numpy as np
+
+from graph_utils import unique_edges
+from profiling import profiled
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+
+
+def _read_rows(path: str) -> List[Dict[str, str]]:
+    with open(path, 'r', encoding='utf-8', newline='') as fh:
+        return list(csv.DictReader(fh))
+
+
+def _to_float(value: Optional[str]) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+@profiled(rows=lambda r: len(r['component_id']))
+def load_twin_arrays(components_csv: str, vulnerabilities_csv: Optional[str] = None,
+                     dependencies_csv: Optional[str] = None,
+                     fill_missing_criticality: float = 1) -> Dict[str, Any]:
+    """Column arrays equivalent to extract_features_from_csvs, read with csv + NumPy only.
+
+    Also returns de-duplicated integer edge arrays 'src'/'dst' between known components
+    (for propagate_risk_array). Vulnerability and dependency files are optional.
+    """
+    comps = _read_rows(components_csv)
+    ids = [r.get('component_id') or '' for r in comps]
+    index = {cid: i for i, cid in enumerate(ids)}
+    n = len(ids)
+
+    crit = np.array([_to_float(r.get('criticality')) for r in comps], dtype=float)
+    crit[np.isnan(crit)] = fill_missing_criticality
+    out: Dict[str, Any] = {
+        'component_id': ids,
+        'role': [r.get('role') or '' for r in comps],
+        'os_type': [r.get('os_type') or '' for r in comps],
+        'layer': [r.get('layer') or '' for r in comps],
+        'exposure_level': [r.get('exposure_level') or '' for r in comps],
+        'is_patched': np.array([str(r.get('is_patched') or '').lower() in TRUE_VALUES for r in comps], dtype=bool),
+        'criticality': crit
+    }
+
+    vuln_count = np.zeros(n, dtype=np.int64)
+    cvss_sum = np.zeros(n)
+    max_cvss = np.zeros(n)
+    if vulnerabilities_csv:
+        comp_idx, scores = [], []
+        for r in _read_rows(vulnerabilities_csv):
+            i = index.get(r.get('component_id') or '')
+            score = _to_float(r.get('cvss_score'))
+            if i is not None and not math.isnan(score):
+                comp_idx.append(i)
+                scores.append(score)
+        comp_idx = np.array(comp_idx, dtype=np.int64)
+        scores = np.array(scores, dtype=float)
+        vuln_count = np.bincount(comp_idx, minlength=n)
+        cvss_sum = np.bincount(comp_idx, weights=scores, minlength=n)
+        np.maximum.at(max_cvss, comp_idx, scores)
+    out['vuln_count'] = vuln_count
+    out['base_cvss_sum'] = cvss_sum
+    out['max_cvss'] = max_cvss
+    out['mean_cvss'] = np.divide(cvss_sum, vuln_count, out=np.zeros(n), where=vuln_count > 0)
+
+    in_degree = np.zeros(n, dtype=np.int64)
+    out_degree = np.zeros(n, dtype=np.int64)
+    src = dst = np.zeros(0, dtype=np.int64)
+    if dependencies_csv:
+        deps = _read_rows(dependencies_csv)
+        # degree counts every row (stripped ids), as compute_degree_features does
+        s_deg = np.array([index.get((r.get('source_component') or '').strip(), -1) for r in deps], dtype=np.int64)
+        t_deg = np.array([index.get((r.get('target_component') or '').strip(), -1) for r in deps], dtype=np.int64)
+        out_degree = np.bincount(s_deg[s_deg >= 0], minlength=n)
+        in_degree = np.bincount(t_deg[t_deg >= 0], minlength=n)
+        s = np.array([index.get(r.get('source_component') or '', -1) for r in deps], dtype=np.int64)
+        t = np.array([index.get(r.get('target_component') or '', -1) for r in deps], dtype=np.int64)
+        known = (s >= 0) & (t >= 0)
+        src, dst = unique_edges(s[known], t[known])
+    out['in_degree'] = in_degree
+    out['out_degree'] = out_degree
+    out['src'] = src
+    out['dst'] = dst
+    return out
@@ -0,0 +1,219 @@
+
+"""Command-line entry point: extract / score / rank / triage / explain.
+
+Only argparse, csv and json are imported at startup; every subcommand imports what it
+needs when it runs. score, rank, triage and explain read the CSVs with twin_arrays and
+use the NumPy code paths, so they never load pandas, scikit-learn, shap or networkx.
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import csv
+import json
+import sys
+
+WEIGHT_KEYS = ('w_c', 'w_v', 'w_e', 'w_p')
+
+
+def _parse_weights(items: Optional[List[str]]) -> Optional[Dict[str, float]]:
+    if not items:
+        return None
+    from risk_scoring import DEFAULT_WEIGHTS
+    weights = dict(DEFAULT_WEIGHTS)
+    for item in items:
+        key, sep, value = item.partition('=')
+        if not sep or key not in WEIGHT_KEYS:
+            raise argparse.ArgumentTypeError(f'Invalid weight {item!r}; expected one of {", ".join(WEIGHT_KEYS)} as key=value')
+        try:
+            weights[key] = float(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'Invalid weight {item!r}; {value!r} is not a number')
+    return weights
+
+
+def _load_costs(path: Optional[str]) -> Dict[str, float]:
+    if not path:
+        return {}
+    with open(path, 'r', encoding='utf-8') as fh:
+        return {str(k): float(v) for k, v in json.load(fh).items()}
+
+
+def _load_twin(args, need_dependencies: bool = False) -> Dict[str, Any]:
+    from twin_arrays import load_twin_arrays
+    if need_dependencies and not args.dependencies:
+        raise SystemExit('--dependencies is required for propagated scores')
+    return load_twin_arrays(args.components, args.vulnerabilities, args.dependencies,
+                            fill_missing_criticality=args.fill_missing_criticality)
+
+
+def _write_rows(rows: List[Dict[str, Any]], args) -> None:
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'json':
+            json.dump(rows, out, indent=2)
+            out.write('\n')
+        elif rows:
+            writer = csv.DictWriter(out, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def cmd_extract(args) -> int:
+    from feature_extraction import extract_features_from_csvs
+    if not args.dependencies or not args.output:
+        raise SystemExit('extract requires --dependencies and --output')
+    df = extract_features_from_csvs(args.components, args.dependencies, args.vulnerabilities,
+                                    fill_missing_criticality=args.fill_missing_criticality)
+    df.to_csv(args.output, index=False)
+    print(f'Wrote {len(df)} feature rows to {args.output}', file=sys.stderr)
+    return 0
+
+
+def cmd_score(args) -> int:
+    from risk_scoring import compute_node_risk_array
+    t = _load_twin(args, need_dependencies=args.propagated)
+    risk = compute_node_risk_array(t['criticality'], t['base_cvss_sum'], t['exposure_level'],
+                                   t['is_patched'], _parse_weights(args.weights))
+    cols = {'node_risk': risk}
+    if args.propagated:
+        from graph_utils import propagate_risk_array
+        cols['propagated_risk'] = propagate_risk_array(risk, t['src'], t['dst'])
+    rows = [dict({'component_id': cid}, **{k: float(v[i]) for k, v in cols.items()})
+            for i, cid in enumerate(t['component_id'])]
+    _write_rows(rows, args)
+    return 0
+
+
+def cmd_rank(args) -> int:
+    from patch_ranking import rank_by_absolute_risk_arrays, rank_by_roi_arrays
+    t = _load_twin(args)
+    weights = _parse_weights(args.weights)
+    if args.by == 'roi':
+        costs = _load_costs(args.costs)
+        cost = [costs.get(cid, 0.0) for cid in t['component_id']]
+        rows = rank_by_roi_arrays(t['component_id'], t['criticality'], t['base_cvss_sum'], t['exposure_level'],
+                                  t['is_patched'], t['vuln_count'], cost, weights=weights,
+                                  patch_effectiveness=args.patch_effectiveness, top_k=args.top_k)
+    else:
+        rows = rank_by_absolute_risk_arrays(t['component_id'], t['criticality'], t['base_cvss_sum'],
+                                            t['exposure_level'], t['is_patched'], t['vuln_count'],
+                                            weights=weights, top_k=args.top_k)
+    _write_rows(rows, args)
+    return 0
+
+
+def cmd_triage(args) -> int:
+    from decision_rules import TRIAGE_LEVELS, rule_justification, triage_array
+    from risk_scoring import compute_node_risk_array
+    t = _load_twin(args)
+    risk = compute_node_risk_array(t['criticality'], t['base_cvss_sum'], t['exposure_level'],
+                                   t['is_patched'], _parse_weights(args.weights))
+    levels = triage_array(risk, t['vuln_count'])
+    index = {cid: i for i, cid in enumerate(t['component_id'])}
+    if args.ids:
+        missing = [cid for cid in args.ids if cid not in index]
+        if missing:
+            raise SystemExit('Unknown component(s): ' + ', '.join(missing))
+        selected = [index[cid] for cid in args.ids]
+    else:
+        selected = range(len(index))
+    costs = _load_costs(args.costs)
+    rows = []
+    for i in selected:
+        cid = t['component_id'][i]
+        row = {'component_id': cid, 'node_risk': float(risk[i]), 'vuln_count': int(t['vuln_count'][i]),
+               'priority': TRIAGE_LEVELS[levels[i]]}
+        if args.justify:
+            row['justification'] = rule_justification(cid, float(risk[i]), int(t['vuln_count'][i]), costs.get(cid))
+        rows.append(row)
+    _write_rows(rows, args)
+    return 0
+
+
+def cmd_explain(args) -> int:
+    import numpy as np
+    from graph_utils import mean_predecessor_risk
+    from risk_attribution import exact_risk_attributions
+    from risk_scoring import compute_node_risk_array, factor_matrix
+    t = _load_twin(args, need_dependencies=args.propagated)
+    weights = _parse_weights(args.weights)
+    F = factor_matrix(t['criticality'], t['base_cvss_sum'], t['exposure_level'], t['is_patched'])
+    upstream = None
+    if args.propagated:
+        r = compute_node_risk_array(t['criticality'], t['base_cvss_sum'], t['exposure_level'], t['is_patched'], weights)
+        upstream = mean_predecessor_risk(r, t['src'], t['dst'])
+    res = exact_risk_attributions(F, weights, upstream=upstream)
+    phi, names = res['shap_values'], res['feature_names']
+
+    if args.component:
+        try:
+            i = t['component_id'].index(args.component)
+        except ValueError:
+            raise SystemExit(f'Unknown component: {args.component}')
+        # same columns as shap_local.explain_instance_shap
+        rows = [{'feature': f, 'shap_value': float(v), 'abs_shap': float(abs(v))} for f, v in zip(names, phi[i])]
+        rows.sort(key=lambda r: -r['abs_shap'])
+    else:
+        # same columns as shap_global.global_shap_importance
+        mean_abs, std_abs = np.abs(phi).mean(axis=0), np.abs(phi).std(axis=0)
+        rows = [{'feature': f, 'mean_abs_shap': float(m), 'std_abs_shap': float(s)}
+                for f, m, s in zip(names, mean_abs, std_abs)]
+        rows.sort(key=lambda r: -r['mean_abs_shap'])
+    _write_rows(rows, args)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='xsec_cli', description='Digital twin risk toolkit')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--components', required=True, help='Components CSV')
+    common.add_argument('--vulnerabilities', default=None, help='Vulnerabilities CSV (optional)')
+    common.add_argument('--dependencies', default=None, help='Dependencies CSV (needed for extract and propagated scores)')
+    common.add_argument('--fill-missing-criticality', type=float, default=1)
+    common.add_argument('--weights', nargs='*', metavar='KEY=VALUE', help='Override risk weights, e.g. w_c=0.4 w_v=0.4')
+    common.add_argument('--format', choices=('csv', 'json'), default='csv')
+    common.add_argument('--output', '-o', default=None, help='Output file (default: stdout)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('extract', parents=[common], help='Write the feature table CSV (uses pandas)')
+    p.set_defaults(func=cmd_extract)
+
+    p = sub.add_parser('score', parents=[common], help='Node risk per component')
+    p.add_argument('--propagated', action='store_true', help='Also output one-hop propagated risk')
+    p.set_defaults(func=cmd_score)
+
+    p = sub.add_parser('rank', parents=[common], help='Patch ranking')
+    p.add_argument('--by', choices=('roi', 'risk'), default='roi')
+    p.add_argument('--costs', default=None, help='JSON file mapping component_id -> patch cost')
+    p.add_argument('--patch-effectiveness', type=float, default=0.6)
+    p.add_argument('--top-k', type=int, default=None)
+    p.set_defaults(func=cmd_rank)
+
+    p = sub.add_parser('triage', parents=[common], help='Triage priority per component')
+    p.add_argument('--ids', nargs='*', default=None, help='Only these component ids')
+    p.add_argument('--justify', action='store_true', help='Add rule_justification text')
+    p.add_argument('--costs', default=None, help='JSON file mapping component_id -> patch cost (for justifications)')
+    p.set_defaults(func=cmd_triage)
+
+    p = sub.add_parser('explain', parents=[common], help='Exact attributions of the risk model')
+    p.add_argument('--component', default=None, help='Local explanation for one component (default: global)')
+    p.add_argument('--propagated', action='store_true', help='Explain propagated risk (adds upstream_risk)')
+    p.set_defaults(func=cmd_explain)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == 'extract' and args.format != 'csv':
+        raise SystemExit('extract always writes CSV')
+    try:
+        _parse_weights(args.weights)
+    except argparse.ArgumentTypeError as e:
+        raise SystemExit(str(e))
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())